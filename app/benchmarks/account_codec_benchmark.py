@@ -0,0 +1,62 @@
+"""
+Compares the cached account codec in core.helper.account_codec_helper against JSON.
+
+Run from the app directory:
+    python -m benchmarks.account_codec_benchmark
+"""
+import json
+import timeit
+from datetime import datetime, timezone
+from core.helper.account_codec_helper import encode_account, decode_account
+
+
+ITERATIONS = 20000
+
+account = {
+    '_id': '7845941214687',
+    'email': 'johndoe@example.com',
+    'firstname': 'John',
+    'lastname': 'Doe',
+    'phone_number': '915 1234 789',
+    'country_code': '+234',
+    'country': 'Nigeria',
+    'username': 'johndoe',
+    'display_pics': None,
+    'hashed_password': '$2b$12$' + 'a' * 53,
+    'version': 1,
+    'disabled': False,
+    'email_verified': True,
+    'phone_verified': True,
+    'is_active': True,
+    'active_device_count': 3,
+    'active_devices': ['127.0.0.1', '10.0.0.2', '10.0.0.3'],
+    'role': {'name': 'authenticated', 'permissions': []},
+    'created_on': datetime.now(timezone.utc),
+    'tokens': ['a' * 128 for _ in range(5)],
+}
+
+
+def per_call_us(statement) -> float:
+    return timeit.timeit(statement, number=ITERATIONS) / ITERATIONS * 1_000_000
+
+
+def run() -> None:
+    encoded_json = json.dumps(account, default=str).encode()
+    encoded_codec = encode_account(data=account)
+
+    rows = [
+        ('json', len(encoded_json),
+         per_call_us(lambda: json.dumps(account, default=str).encode()),
+         per_call_us(lambda: json.loads(encoded_json))),
+        ('account codec', len(encoded_codec),
+         per_call_us(lambda: encode_account(data=account)),
+         per_call_us(lambda: decode_account(data=encoded_codec))),
+    ]
+
+    print(f"{'format':<16}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    for name, size, encode_us, decode_us in rows:
+        print(f"{name:<16}{size:>8}{encode_us:>12.2f}{decode_us:>12.2f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,76 @@
+"""
+Compares model.serialize()/deserialize() against the cached codec in core.helper.codec_helper.
+
+Run from the app directory:
+    python -m benchmarks.avro_codec_benchmark
+"""
+import timeit
+from datetime import datetime, timedelta, timezone
+from core.model.token_model import AssignToken, UpdateToken, AuthToken
+from core.model.cache_model import Cache
+from core.model.otp_model import OTP
+from core.model.account_model import AccountInDB
+from core.helper.codec_helper import serialize_event, deserialize_event, serialize_cache_event
+
+
+ITERATIONS = 5000
+
+now = datetime.now(timezone.utc)
+
+device_info = {
+    'device_name': 'Samsong s23 ultra',
+    'platform': 'IOS',
+    'ip_address': '127.0.0.1',
+    'device_model': 'string',
+    'device_id': 'string',
+    'screen_info': {'height': 1920, 'width': 720, 'resolution': 1200},
+    'device_serial_number': '124578963',
+    'is_active': True,
+}
+
+auth_token = {'email': 'johndoe@example.com', 'token': 'a' * 128, 'expiry': now + timedelta(minutes=5)}
+
+samples = {
+    AssignToken: {'id': '7845941214687', 'email': 'johndoe@example.com', 'device_ip': '127.0.0.1', 'token': 'a' * 128, 'device_info': device_info},
+    UpdateToken: {'id': '7845941214687', 'old_token': 'a' * 128, 'new_token': 'b' * 128},
+    AuthToken: auth_token,
+    Cache: {'key': 'auth_token:johndoe@example.com', 'data': serialize_event(AuthToken, auth_token)},
+    OTP: {'purpose': 'email_verification', 'firstname': 'John', 'email': 'johndoe@example.com', 'phone_number': '915 1234 789',
+          'otp': '123456', 'created_on': now, 'expires_on': now + timedelta(minutes=5)},
+    AccountInDB: {'_id': '7845941214687', 'email': 'johndoe@example.com', 'firstname': 'John', 'lastname': 'Doe',
+                  'phone_number': '915 1234 789', 'country_code': '+234', 'country': 'Nigeria', 'username': 'johndoe',
+                  'display_pics': None, 'hashed_password': '$2b$12$' + 'a' * 53, 'version': 1, 'disabled': False,
+                  'email_verified': True, 'phone_verified': True, 'is_active': True, 'active_device_count': 1,
+                  'active_devices': ['127.0.0.1'], 'role': {'name': 'authenticated', 'permissions': []}, 'created_on': now},
+}
+
+
+def per_call_us(statement) -> float:
+    return timeit.timeit(statement, number=ITERATIONS) / ITERATIONS * 1_000_000
+
+
+def run() -> None:
+    print(f"{'model':<14}{'serialize()':>14}{'codec':>10}{'deserialize()':>16}{'codec':>10}   (us per call)")
+
+    for model, data in samples.items():
+        # A model that cannot be built fails the run, every row must be measured
+        encoded = model(**data).serialize()
+        model_serialize = per_call_us(lambda: model(**data).serialize())
+        model_deserialize = per_call_us(lambda: model.deserialize(encoded))
+
+        # The codec takes the record as written, keyed by schema field name rather than alias
+        record = deserialize_event(model, encoded)
+        codec_serialize = per_call_us(lambda: serialize_event(model, record))
+        codec_deserialize = per_call_us(lambda: deserialize_event(model, encoded))
+
+        print(f"{model.__name__:<14}{model_serialize:>14.1f}{codec_serialize:>10.1f}{model_deserialize:>16.1f}{codec_deserialize:>10.1f}")
+
+    # Nested record: auth token wrapped in a cache event
+    key = 'auth_token:johndoe@example.com'
+    model_nested = per_call_us(lambda: Cache(key=key, data=AuthToken(**auth_token).serialize()).serialize())
+    codec_nested = per_call_us(lambda: serialize_cache_event(key=key, model=AuthToken, data=auth_token))
+    print(f"{'Cache(AuthToken)':<14}{model_nested:>12.1f}{codec_nested:>10.1f}")
+
+
+if __name__ == '__main__':
+    run()
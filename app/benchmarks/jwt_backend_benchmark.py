@@ -0,0 +1,68 @@
+"""
+Measures sign and verify throughput of each JWT backend in core.helper.jwt_backend_helper,
+per algorithm, with the same aud/iss/sub/exp validation the service applies.
+
+Run from the app directory:
+    python -m benchmarks.jwt_backend_benchmark
+"""
+import time
+from datetime import datetime, timedelta
+from cryptography.hazmat.primitives.asymmetric import rsa, ec, ed25519
+from core.helper.jwt_backend_helper import JWT_BACKENDS
+from benchmarks.key_helper import get_pem_pair
+
+
+DURATION_SECONDS = 1.0
+
+audience, issuer, subject = 'clients', 'auth', 'access'
+
+claims = {
+    'iss': issuer,
+    'aud': audience,
+    'sub': subject,
+    'firstname': 'John',
+    'lastname': 'Doe',
+    'email': 'johndoe@example.com',
+    'id': '7845941214687',
+    'admin': False,
+    'iat': datetime.utcnow(),
+    'exp': datetime.utcnow() + timedelta(hours=1),
+}
+
+
+def ops_per_second(statement) -> float:
+    count, started_on = 0, time.perf_counter()
+    while time.perf_counter() - started_on < DURATION_SECONDS:
+        statement()
+        count += 1
+    return count / (time.perf_counter() - started_on)
+
+
+def run() -> None:
+    keys = {
+        'HS256': ('a-shared-secret-of-reasonable-length', 'a-shared-secret-of-reasonable-length'),
+        'RS256': get_pem_pair(rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        'ES256': get_pem_pair(ec.generate_private_key(ec.SECP256R1())),
+        'EdDSA': get_pem_pair(ed25519.Ed25519PrivateKey.generate()),
+    }
+
+    print(f"{'algorithm':<10}{'backend':<10}{'sign/s':>12}{'verify/s':>12}")
+    for algorithm, (signing_material, verification_material) in keys.items():
+        for name, backend_class in JWT_BACKENDS.items():
+            backend = backend_class()
+            if algorithm not in backend.algorithms:
+                print(f"{algorithm:<10}{name:<10}{'unsupported':>24}")
+                continue
+
+            signing_key = backend.load_signing_key(algorithm=algorithm, material=signing_material)
+            verification_key = backend.load_verification_key(algorithm=algorithm, material=verification_material)
+            token = backend.encode(claims=claims, key=signing_key, algorithm=algorithm)
+
+            sign_rate = ops_per_second(lambda: backend.encode(claims=claims, key=signing_key, algorithm=algorithm))
+            verify_rate = ops_per_second(lambda: backend.decode(token=token, key=verification_key, algorithm=algorithm,
+                                                                 audience=audience, issuer=issuer, subject=subject))
+            print(f"{algorithm:<10}{name:<10}{sign_rate:>12.0f}{verify_rate:>12.0f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,28 @@
+"""
+Key material shared by the benchmarks and tests that sign tokens with generated keys.
+"""
+import os
+from cryptography.hazmat.primitives import serialization
+
+
+def get_pem_pair(private_key) -> tuple[str, str]:
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_pem, public_pem
+
+
+def write_pem_pair(directory: str, name: str, private_key) -> tuple[str, str]:
+    paths = []
+    for suffix, pem in zip(('private', 'public'), get_pem_pair(private_key)):
+        path = os.path.join(directory, f"{name}-{suffix}.pem")
+        with open(path, 'w') as pem_file:
+            pem_file.write(pem)
+        paths.append(path)
+    return tuple(paths)
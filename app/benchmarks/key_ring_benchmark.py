@@ -0,0 +1,75 @@
+"""
+Measures create_token and verify_token against a real KeyRing, built once the way
+core.helper.key_ring_helper builds it from settings, and compares them with rebuilding
+the ring key from its PEM files on every call.
+
+Run from the app directory:
+    python -m benchmarks.key_ring_benchmark
+"""
+import tempfile
+import time
+import timeit
+from cryptography.hazmat.primitives.asymmetric import rsa, ec
+from benchmarks.key_helper import write_pem_pair
+from core.model.key_model import KeyRingEntry
+from core.helper.key_ring_helper import KeyRing, build_key_ring, build_ring_key
+from core.helper.token_helper import create_token, verify_token
+from core.utils.settings import settings
+
+
+ITERATIONS = 2000
+
+claims = {
+    'iss': settings.api_token_iss,
+    'aud': settings.api_token_aud,
+    'sub': settings.api_token_sub,
+    'firstname': 'John',
+    'lastname': 'Doe',
+    'email': 'johndoe@example.com',
+    'id': '7845941214687',
+    'admin': False,
+    'iat': int(time.time()),
+    'exp': int(time.time()) + 3600,
+}
+
+
+def per_call_us(statement) -> float:
+    return timeit.timeit(statement, number=ITERATIONS) / ITERATIONS * 1_000_000
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        rs256_private_path, rs256_public_path = write_pem_pair(directory, 'rs256', rsa.generate_private_key(public_exponent=65537, key_size=2048))
+        es256_private_path, es256_public_path = write_pem_pair(directory, 'es256', ec.generate_private_key(ec.SECP256R1()))
+
+        entries = [
+            KeyRingEntry(kid='bench-hs256', algorithm='HS256', secret='a-shared-secret-of-reasonable-length'),
+            KeyRingEntry(kid='bench-rs256', algorithm='RS256', private_key_path=rs256_private_path, public_key_path=rs256_public_path),
+            KeyRingEntry(kid='bench-es256', algorithm='ES256', private_key_path=es256_private_path, public_key_path=es256_public_path),
+        ]
+
+        print(f"{'algorithm':<10}{'keys':<10}{'key build us':>14}{'sign us':>12}{'verify us':>12}")
+        for entry in entries:
+            # The ring the service holds mid-rotation, with the previous key still verifying
+            previous_entry = KeyRingEntry(kid='bench-previous', algorithm='HS256', secret='a-previous-shared-secret')
+            key_ring = build_key_ring(entries=[previous_entry.model_dump(), entry.model_dump()], default_entry=entry)
+            token = create_token(payload=claims, key_ring=key_ring)
+
+            def rebuilt_ring() -> KeyRing:
+                return KeyRing(keys=[build_ring_key(entry)])
+
+            rows = [
+                ('raw', per_call_us(lambda: build_ring_key(entry)),
+                 per_call_us(lambda: create_token(payload=claims, key_ring=rebuilt_ring())),
+                 per_call_us(lambda: verify_token(token=token, key_ring=rebuilt_ring()))),
+                ('ring', 0.0,
+                 per_call_us(lambda: create_token(payload=claims, key_ring=key_ring)),
+                 per_call_us(lambda: verify_token(token=token, key_ring=key_ring))),
+            ]
+
+            for name, build_us, sign_us, verify_us in rows:
+                print(f"{entry.algorithm:<10}{name:<10}{build_us:>14.2f}{sign_us:>12.2f}{verify_us:>12.2f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,48 @@
+"""
+Measures token pairs minted per second on one core, one pair at a time with
+generate_token_set and in batches with generate_token_sets, using the
+configured key rings and JWT backend.
+
+Run from the app directory:
+    python -m benchmarks.token_minting_benchmark
+"""
+import time
+from core.helper.token_helper import generate_token_set, generate_token_sets
+
+
+ACCOUNT_COUNT = 5000
+BATCH_SIZE = 500
+
+accounts = [
+    {
+        'id': f"{7845941214687 + index}",
+        'is_admin': False,
+        'firstname': 'John',
+        'lastname': 'Doe',
+        'email': f"johndoe{index}@example.com",
+    }
+    for index in range(ACCOUNT_COUNT)
+]
+
+
+def pairs_per_second(mint) -> float:
+    started_on = time.process_time()
+    mint()
+    return ACCOUNT_COUNT / (time.process_time() - started_on)
+
+
+def run() -> None:
+    rows = [
+        ('generate_token_set', pairs_per_second(lambda: [generate_token_set(**account) for account in accounts])),
+        (f"generate_token_sets x{BATCH_SIZE}", pairs_per_second(lambda: [
+            generate_token_sets(accounts=accounts[start:start + BATCH_SIZE]) for start in range(0, ACCOUNT_COUNT, BATCH_SIZE)
+        ])),
+    ]
+
+    print(f"{'minting':<28}{'pairs/s/core':>14}")
+    for name, rate in rows:
+        print(f"{name:<28}{rate:>14.0f}")
+
+
+if __name__ == '__main__':
+    run()
@@ -1,7 +1,54 @@
 from core.utils.settings import settings
 from  redis import asyncio as aioredis
+from core.utils.init_log import logger
 
 
 redis = aioredis.from_url(
-    url=settings.api_redis_host_local,    
-)
\ No newline at end of file
+    url=settings.api_redis_host_local,
+    max_connections=settings.api_redis_max_connections,
+    socket_timeout=settings.api_redis_socket_timeout,
+    socket_connect_timeout=settings.api_redis_socket_connect_timeout,
+    health_check_interval=settings.api_redis_health_check_interval,
+)
+
+
+def get_cache_pool_stats() -> dict:
+    """
+    This is used to report how much of the cache connection pool is in use.
+    @returns {dict} - The connection pool counters
+    """
+    pool = redis.connection_pool
+    in_use = len(getattr(pool, '_in_use_connections', ()))
+    return {
+        'max_connections': pool.max_connections,
+        'open': getattr(pool, '_created_connections', 0),
+        'available': len(getattr(pool, '_available_connections', ())),
+        'in_use': in_use,
+        'utilization': round(in_use / pool.max_connections, 4),
+    }
+
+
+async def connect_cache() -> None:
+    """
+    This is used to warm the cache client before the server accepts traffic.
+    Connections are opened and pinged, then returned to the pool for reuse.
+    """
+    logger.info('Connecting to cache.')
+    pool = redis.connection_pool
+    connections = []
+
+    try:
+        for _ in range(min(settings.api_redis_warm_connections, pool.max_connections)):
+            connections.append(await pool.get_connection('PING'))
+
+        for connection in connections:
+            await connection.send_command('PING')
+            await connection.read_response()
+    finally:
+        for connection in connections:
+            await pool.release(connection)
+
+
+async def close_cache() -> None:
+    logger.info('Closing cache connections.')
+    await redis.aclose()
@@ -1,9 +1,72 @@
+import asyncio
 import motor.motor_asyncio
+from pymongo import IndexModel, ASCENDING
+from pymongo.monitoring import ConnectionPoolListener
 from core.utils.settings import settings
+from core.utils.init_log import logger
 
 
-# Initialize database
-client = motor.motor_asyncio.AsyncIOMotorClient(settings.api_db_url)
+# Connection pool counters
+db_pool_stats = {
+    'created': 0,
+    'closed': 0,
+    'checked_out': 0,
+    'checkout_failed': 0,
+    'max_checked_out': 0,
+}
+
+
+class PoolStatsListener(ConnectionPoolListener):
+    """
+    Counts connections opened, closed and in use across the client's pools.
+    """
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_created(self, event):
+        db_pool_stats['created'] += 1
+
+    def connection_closed(self, event):
+        db_pool_stats['closed'] += 1
+
+    def connection_checked_out(self, event):
+        db_pool_stats['checked_out'] += 1
+        db_pool_stats['max_checked_out'] = max(db_pool_stats['max_checked_out'], db_pool_stats['checked_out'])
+
+    def connection_check_out_failed(self, event):
+        db_pool_stats['checkout_failed'] += 1
+
+    def connection_checked_in(self, event):
+        db_pool_stats['checked_out'] -= 1
+
+
+# Initialize database, min_pool_size keeps connections open before traffic arrives
+client = motor.motor_asyncio.AsyncIOMotorClient(
+    settings.api_db_url,
+    maxPoolSize=settings.api_db_max_pool_size,
+    minPoolSize=settings.api_db_min_pool_size,
+    maxIdleTimeMS=settings.api_db_max_idle_time_ms,
+    connectTimeoutMS=settings.api_db_connect_timeout_ms,
+    serverSelectionTimeoutMS=settings.api_db_server_selection_timeout_ms,
+    waitQueueTimeoutMS=settings.api_db_wait_queue_timeout_ms,
+    event_listeners=[PoolStatsListener()]
+)
 
 # Create database
 account_db = client.account_db
@@ -11,4 +74,83 @@ account_db = client.account_db
 # Create accounts collection
 account_col = account_db.accounts
 
+# Create refresh token sessions collection
+token_session_col = account_db.token_sessions
+
+# Indexes backing every accounts query in db_helper
+ACCOUNT_INDEXES = [
+    IndexModel([('email', ASCENDING)], name='email_unique', unique=True),
+    IndexModel(
+        [('phone_number', ASCENDING)],
+        name='phone_number_unique',
+        unique=True,
+        partialFilterExpression={'phone_number': {'$type': 'string'}}
+    ),
+]
+
+# Indexes dropped from ACCOUNT_INDEXES, removed where earlier versions created them
+RETIRED_ACCOUNT_INDEXES = ['id_tokens']
+
+# Sessions are looked up by '_id' and expire on their own
+TOKEN_SESSION_INDEXES = [
+    IndexModel([('account_id', ASCENDING)], name='account_id'),
+    IndexModel([('expires_on', ASCENDING)], name='expires_on_ttl', expireAfterSeconds=0),
+]
+
+
+async def create_indexes() -> None:
+    """
+    This is used to make sure the accounts and token session collections have the indexes their queries rely on.
+    Existing indexes with the same definition are left as they are.
+    """
+    try:
+        logger.info('Creating accounts collection indexes.')
+        existing_indexes = await account_col.index_information()
+
+        # Indexes whose definition changed have to be dropped before they can be created again
+        for index in ACCOUNT_INDEXES:
+            name = index.document['name']
+            if name in existing_indexes and existing_indexes[name].get('partialFilterExpression') != index.document.get('partialFilterExpression'):
+                await account_col.drop_index(name)
+
+        for name in RETIRED_ACCOUNT_INDEXES:
+            if name in existing_indexes:
+                await account_col.drop_index(name)
+
+        await account_col.create_indexes(ACCOUNT_INDEXES)
+        await token_session_col.create_indexes(TOKEN_SESSION_INDEXES)
+    except Exception as err:
+        logger.error(f"Failed to create accounts collection indexes due to error: {str(err)}", exc_info=1)
+
+
+def get_db_pool_stats() -> dict:
+    """
+    This is used to report how much of the database connection pool is in use.
+    @returns {dict} - The connection pool counters
+    """
+    return {
+        'max_pool_size': settings.api_db_max_pool_size,
+        'min_pool_size': settings.api_db_min_pool_size,
+        'open': db_pool_stats['created'] - db_pool_stats['closed'],
+        'utilization': round(db_pool_stats['checked_out'] / settings.api_db_max_pool_size, 4),
+        **db_pool_stats,
+    }
+
+
+async def connect_db() -> None:
+    """
+    This is used to warm the database client before the server accepts traffic.
+    The ping selects a server and the queries open up to min_pool_size connections.
+    """
+    logger.info('Connecting to database.')
+    await client.admin.command('ping')
+
+    # Open connections concurrently rather than on the first requests
+    await asyncio.gather(*[
+        account_db.command('ping') for _ in range(settings.api_db_min_pool_size)
+    ])
+
 
+def close_db() -> None:
+    logger.info('Closing database connections.')
+    client.close()
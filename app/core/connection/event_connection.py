@@ -0,0 +1,72 @@
+import asyncio
+from aiokafka import AIOKafkaProducer
+from core.utils.settings import settings
+from core.utils.init_log import logger
+
+
+# Shared producer, owned by the app lifespan
+producer: AIOKafkaProducer | None = None
+
+# Guards concurrent lazy starts
+_producer_lock = asyncio.Lock()
+
+
+async def start_producer() -> AIOKafkaProducer:
+    """
+    This is used to create and start the shared Kafka producer.
+    @returns {object} - The started producer
+    """
+    global producer
+
+    async with _producer_lock:
+        if producer is not None:
+            return producer
+
+        # Create the producer
+        new_producer = AIOKafkaProducer(
+            client_id=settings.api_event_streaming_client_id,
+            bootstrap_servers=settings.api_event_streaming_host,
+        )
+
+        # Start the producer and get brokers metadata
+        logger.info('Starting shared kafka producer.')
+        try:
+            await new_producer.start()
+        except Exception:
+            await new_producer.stop()
+            raise
+        producer = new_producer
+
+    return producer
+
+
+async def get_producer() -> AIOKafkaProducer:
+    """
+    This is used to retrieve the shared Kafka producer.
+    The producer is started on first use if the app lifespan did not start it.
+    @returns {object} - The started producer
+    """
+    if producer is not None:
+        return producer
+    return await start_producer()
+
+
+async def stop_producer() -> None:
+    """
+    This is used to flush pending messages and close the shared Kafka producer.
+    """
+    global producer
+
+    async with _producer_lock:
+        if producer is None:
+            return
+
+        try:
+            logger.info('Flushing shared kafka producer.')
+            await producer.flush()
+        except Exception as err:
+            logger.error(f"Failed to flush Kafka producer due to error: {str(err)}", exc_info=1)
+        finally:
+            logger.info('Closing shared kafka producer.')
+            await producer.stop()
+            producer = None
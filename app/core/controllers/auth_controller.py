@@ -1,4 +1,7 @@
-from fastapi import HTTPException, status, Request
+import hashlib
+import json
+from functools import partial
+from fastapi import HTTPException, status, Request, BackgroundTasks, Response
 
 from core.helper.token_helper import *
 from core.helper.account_helper import *
@@ -9,6 +12,8 @@ from core.enums.auth_enum import Role
 from fastapi.responses import JSONResponse
 from core.utils.init_log import logger
 from core.utils.error import credential_error
+from core.helper.rate_limit_helper import check_login_rate_limit
+from core.helper.key_ring_helper import get_jwks, get_refresh_key_ring
 
 
 async def verify_access_token_ctrl(request: Request) -> dict:
@@ -20,7 +25,7 @@ async def verify_access_token_ctrl(request: Request) -> dict:
     
     # Validate token
     logger.info('Verifying token')
-    valid_token_data = verify_token(token=access_token, secret=settings.api_access_token_secret)
+    valid_token_data = verify_access_token(token=access_token)
     if not valid_token_data:
         logger.error(f'Invalid access token:{access_token}')
         raise credential_error
@@ -31,7 +36,63 @@ async def verify_access_token_ctrl(request: Request) -> dict:
     )
     
 
-async def create_access_token_ctrl(request: Request) -> dict:
+def introspect_token(token: str, verify) -> dict:
+    try:
+        return {'active': True, 'claims': verify(token=token)}
+    except HTTPException as err:
+        return {'active': False, 'error': err.detail}
+
+
+async def introspect_tokens_ctrl(data: IntrospectTokens) -> dict:
+    # Bound the work a single request can ask for
+    if len(data.access_tokens) + len(data.refresh_tokens) > settings.api_introspect_max_tokens:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.api_introspect_max_tokens} tokens can be introspected at once."
+        )
+
+    # Verify signatures and claims
+    verify_refresh_token = partial(verify_token, key_ring=get_refresh_key_ring())
+    access_tokens = [introspect_token(token=token, verify=verify_access_token) for token in data.access_tokens]
+    refresh_tokens = [introspect_token(token=token, verify=verify_refresh_token) for token in data.refresh_tokens]
+
+    # Check every valid refresh token for revocation together
+    valid_refresh_tokens = [
+        (index, token) for index, (token, result) in enumerate(zip(data.refresh_tokens, refresh_tokens)) if result['active']
+    ]
+    revoked = await are_revoked_tokens(tokens=[
+        (token, refresh_tokens[index]['claims'].get('id')) for index, token in valid_refresh_tokens
+    ])
+    for (index, _), is_revoked in zip(valid_refresh_tokens, revoked):
+        if is_revoked:
+            refresh_tokens[index] = {'active': False, 'error': 'Revoked refresh token'}
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={'access_tokens': access_tokens, 'refresh_tokens': refresh_tokens}
+    )
+
+
+async def get_jwks_ctrl(request: Request) -> dict:
+    # Public keys only change on rotation, so let clients and proxies cache them
+    jwks = get_jwks()
+    etag = f'"{hashlib.sha256(json.dumps(jwks, sort_keys=True).encode()).hexdigest()}"'
+    headers = {
+        'Cache-Control': f"public, max-age={settings.api_jwks_max_age}",
+        'ETag': etag,
+    }
+
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jwks,
+        headers=headers
+    )
+
+
+async def create_access_token_ctrl(request: Request, background_tasks: BackgroundTasks | None = None) -> dict:
     # Get refresh token
     logger.info('Checking if header has authorization token.')
     refresh_token = has_token(request=request)
@@ -40,11 +101,11 @@ async def create_access_token_ctrl(request: Request) -> dict:
     
     # Validate refresh token
     logger.info('Validating token.')
-    token_data = verify_token(token=refresh_token, secret=settings.api_refresh_token_secret)
+    token_data = verify_token(token=refresh_token, key_ring=get_refresh_key_ring())
     
     # Check if its reused token
     logger.info('Checking if its reused token.')
-    account_data = await is_reused_token(id=token_data.get('id'), token=refresh_token)
+    account_data, has_session = await is_reused_token(id=token_data.get('id'), token=refresh_token, background_tasks=background_tasks)
     if not account_data:
         logger.warning('Reused token detected.')
         await invalidate_account_tokens(id=token_data.get('id'))    
@@ -64,11 +125,21 @@ async def create_access_token_ctrl(request: Request) -> dict:
         lastname=account_data.get('lastname'), 
         email=account_data.get('email'))
     
-    # Update token in database
-    await update_account_token(
+    # Update token in database, only one refresh can consume the session
+    is_rotated = await update_account_token(
         old_token=refresh_token, 
         new_token=new_refresh_token, 
-        id=account_data.get('_id'))
+        id=account_data.get('_id'),
+        device_ip=request.client.host,
+        has_session=has_session,
+        background_tasks=background_tasks)
+    if not is_rotated:
+        logger.warning('Reused token detected.')
+        await invalidate_account_tokens(id=token_data.get('id'))
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='Reused refresh token detected.'
+        )
    
     # Create response dict
     token_response = {
@@ -83,9 +154,14 @@ async def create_access_token_ctrl(request: Request) -> dict:
     return token_response
 
 
-async def login_for_access_token_ctrl(request: Request, data, auth_type: str) -> dict:    # Validate credentials
+async def login_for_access_token_ctrl(request: Request, data, auth_type: str, background_tasks: BackgroundTasks | None = None) -> dict:
+    # Shed over-limit attempts before any database or hash work
+    identifier = data.email if auth_type == AuthType.email.value else data.phone_number
+    await check_login_rate_limit(ip=request.client.host, identifier=identifier)
+
+    # Validate credentials
     logger.info('Validating account credentials.')
-    account_data = await authenticate_account(device_ip= request.client.host, data=data, auth_type=auth_type)
+    account_data = await authenticate_account(device_ip= request.client.host, data=data, auth_type=auth_type, background_tasks=background_tasks)
 
     # Check if account belongs to admin
     is_admin = account_data.role.name == Role.admin.value
@@ -102,12 +178,12 @@ async def login_for_access_token_ctrl(request: Request, data, auth_type: str) ->
     }
 
     # Update account
-    await update_account(token=refresh_token, id=account_data.id, email=account_data.email, device_ip=request.client.host, device_data=data.device_info)
+    await update_account(token=refresh_token, id=account_data.id, email=account_data.email, device_ip=request.client.host, device_data=data.device_info, background_tasks=background_tasks)
 
     return token_response
 
 
-async def logout_ctrl(request: Request) -> None:
+async def logout_ctrl(request: Request, background_tasks: BackgroundTasks | None = None) -> None:
     # Get refresh token
     logger.info('Fetching authorization token')    
     refresh_token = has_token(request=request)
@@ -116,13 +192,13 @@ async def logout_ctrl(request: Request) -> None:
     
      # Validate refresh token
     logger.info('Validating refresh token')
-    token_data = verify_token(token=refresh_token, secret=settings.api_refresh_token_secret)
+    token_data = verify_token(token=refresh_token, key_ring=get_refresh_key_ring())
     if not token_data:  
        raise credential_error
    
     # Check if its reused token
     logger.info('Checking if its reused token.')
-    account_data = await is_reused_token(id=token_data.get('id'), token=refresh_token)
+    account_data, _ = await is_reused_token(id=token_data.get('id'), token=refresh_token, background_tasks=background_tasks)
     if not account_data:
         logger.warning('Reused token detected.')
         await invalidate_account_tokens(id=token_data.get('id'))    
@@ -133,7 +209,7 @@ async def logout_ctrl(request: Request) -> None:
     
     # Revoke refresh token
     logger.info('Revoking refresh token')
-    await revoke_refresh_token(id=token_data.get('id'), token=refresh_token, device_ip=request.client.host)
+    await revoke_refresh_token(id=token_data.get('id'), token=refresh_token, device_ip=request.client.host, background_tasks=background_tasks)
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -164,8 +240,9 @@ async def verify_one_time_password_ctrl(verify_otp: VerifyOTP) -> str:
     # Produce a cache token event
     await cache_auth_token_event(token=encrypted_auth_token, email=verify_otp.email)
    
-    # Invalidate OTP
-    await invalidate_otp(otp=verify_otp.one_time_password, email=verify_otp.email, purpose=verify_otp.purpose)
+    # The OTP was deleted when validated, the invalidation event is only an audit trail
+    if settings.api_cache_invalidation_audit:
+        await invalidate_otp(otp=verify_otp.one_time_password, email=verify_otp.email, purpose=verify_otp.purpose)
     
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -183,8 +260,9 @@ async def verify_auth_token_ctrl(email: EmailStr, auth_token: str):
                 detail='Invalid auth token.'            
             )
     
-    # Invalidate auth token
-    await invalidate_auth_token(email=email, token=auth_token)
+    # The auth token was deleted when validated, the invalidation event is only an audit trail
+    if settings.api_cache_invalidation_audit:
+        await invalidate_auth_token(email=email, token=auth_token)
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -0,0 +1,27 @@
+from core.event.event_pipeline import get_event_pipeline_stats
+from core.event.event_outbox import get_event_outbox_stats
+from core.event.event_durability import get_event_durability_stats
+from core.helper.local_cache_helper import account_local_cache, account_index_local_cache, verified_token_local_cache
+from core.connection.db_connection import get_db_pool_stats
+from core.connection.cache_connection import get_cache_pool_stats
+from core.helper.revoked_token_filter_helper import get_revoked_token_filter_stats
+from core.helper.password_helper import get_password_hash_stats
+from core.helper.rate_limit_helper import get_rate_limit_stats
+from core.helper.negative_cache_helper import get_negative_cache_stats
+
+
+async def get_stats_ctrl() -> dict:
+    return {
+        'event_pipeline': get_event_pipeline_stats(),
+        'event_outbox': get_event_outbox_stats(),
+        'event_durability': get_event_durability_stats(),
+        'account_local_cache': account_local_cache.get_stats(),
+        'account_index_local_cache': account_index_local_cache.get_stats(),
+        'verified_token_cache': verified_token_local_cache.get_stats(),
+        'db_pool': get_db_pool_stats(),
+        'cache_pool': get_cache_pool_stats(),
+        'revoked_token_filter': get_revoked_token_filter_stats(),
+        'password_hash': get_password_hash_stats(),
+        'login_rate_limit': get_rate_limit_stats(),
+        'missing_account_cache': get_negative_cache_stats(),
+    }
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ConsumeResult(int, Enum):
+    missing=0
+    valid=1
+    expired=2
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class Durability(str, Enum):
+    must_ack='must_ack'
+    ack_after_response='ack_after_response'
+    best_effort='best_effort'
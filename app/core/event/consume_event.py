@@ -0,0 +1,144 @@
+import asyncio
+from typing import Awaitable, Callable
+from aiokafka import AIOKafkaConsumer
+from core.utils.settings import settings
+from core.utils.init_log import logger
+
+
+# Handlers of the events this instance listens to, per topic
+event_handlers: dict[str, list[Callable[[bytes], Awaitable[None] | None]]] = {}
+
+# Handlers run every time the consumer (re)starts
+consumer_start_handlers: list[Callable[[], None]] = []
+
+# Shared consumer and the task keeping it running
+consumer: AIOKafkaConsumer | None = None
+consume_task: asyncio.Task | None = None
+
+# Counts consumer starts, None while the consumer is down
+consumer_epoch: int | None = None
+
+
+def register_event_handler(topic: str, handler: Callable[[bytes], Awaitable[None] | None]) -> None:
+    """
+    This is used to run a handler on every event of a topic.
+    @params {topic} - The topic to listen to.
+    @params {handler} - A function called with the serialized event.
+    """
+    event_handlers.setdefault(topic, []).append(handler)
+
+
+def register_consumer_start_handler(handler: Callable[[], None]) -> None:
+    """
+    This is used to catch up on events missed while the consumer was down.
+    @params {handler} - A function called every time the consumer starts.
+    """
+    consumer_start_handlers.append(handler)
+
+
+def get_event_consumer_epoch() -> int | None:
+    """
+    This is used by state kept up to date by events to tell it missed some.
+    @returns {int} - A number that changes on every consumer restart, or None while the consumer is down
+    """
+    return consumer_epoch
+
+
+def is_event_consumer_running() -> bool:
+    return consumer_epoch is not None
+
+
+async def handle_event(topic: str, value: bytes) -> None:
+    for handler in event_handlers.get(topic, []):
+        try:
+            result = handler(value)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as err:
+            logger.error(f"Failed to handle event from topic:{topic} due to error: {str(err)}", exc_info=1)
+
+
+def run_consumer_start_handlers() -> None:
+    for handler in consumer_start_handlers:
+        try:
+            handler()
+        except Exception as err:
+            logger.error(f"Failed to run consumer start handler due to error: {str(err)}", exc_info=1)
+
+
+async def consume_events() -> None:
+    """
+    This is used to keep the consumer running. A consumer that fails to start or
+    stops consuming is replaced after a backoff, for the lifetime of the process.
+    """
+    global consumer, consumer_epoch
+
+    epoch = 0
+    retry_seconds = settings.api_event_consumer_retry_seconds
+
+    while True:
+        new_consumer = AIOKafkaConsumer(
+            *event_handlers.keys(),
+            bootstrap_servers=settings.api_event_streaming_host,
+            client_id=settings.api_event_streaming_client_id,
+            group_id=None,
+            auto_offset_reset='latest',
+            enable_auto_commit=False,
+        )
+
+        try:
+            logger.info('Starting kafka consumer.')
+            await new_consumer.start()
+            consumer = new_consumer
+
+            # Events sent while the consumer was down are lost, so followers start over
+            epoch += 1
+            consumer_epoch = epoch
+            retry_seconds = settings.api_event_consumer_retry_seconds
+            run_consumer_start_handlers()
+
+            async for message in new_consumer:
+                await handle_event(topic=message.topic, value=message.value)
+            logger.error('Kafka consumer stopped consuming.')
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            logger.error(f"Kafka consumer failed due to error: {str(err)}", exc_info=1)
+        finally:
+            consumer_epoch = None
+            consumer = None
+            try:
+                await new_consumer.stop()
+            except Exception as err:
+                logger.error(f"Failed to close kafka consumer due to error: {str(err)}")
+
+        logger.warning(f"Restarting kafka consumer in {retry_seconds}s.")
+        await asyncio.sleep(retry_seconds)
+        retry_seconds = min(retry_seconds * 2, settings.api_event_consumer_max_retry_seconds)
+
+
+async def start_event_consumer() -> None:
+    """
+    This is used to start consuming the registered topics in the background.
+    Every instance reads all partitions, without a consumer group, since
+    the handlers keep per-instance state such as local caches.
+    """
+    global consume_task
+
+    if consume_task is not None or not event_handlers:
+        return
+
+    consume_task = asyncio.create_task(consume_events())
+
+
+async def stop_event_consumer() -> None:
+    global consume_task
+
+    if consume_task is not None:
+        logger.info('Closing kafka consumer.')
+        consume_task.cancel()
+        try:
+            await consume_task
+        except asyncio.CancelledError:
+            pass
+        consume_task = None
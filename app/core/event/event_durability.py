@@ -0,0 +1,59 @@
+import asyncio
+from core.enums.event_enum import Durability
+from core.utils.settings import settings
+from core.utils.init_log import logger
+
+
+# Delivery counters per durability class
+durability_stats = {
+    durability.value: {'emitted': 0, 'acked': 0, 'failed': 0, 'dropped': 0}
+    for durability in Durability
+}
+
+
+def get_event_durability_stats() -> dict:
+    """
+    This is used to report event completion and failures per durability class.
+    @returns {dict} - The delivery counters
+    """
+    return {durability: dict(counters) for durability, counters in durability_stats.items()}
+
+
+def get_topic_durability(topic: str) -> Durability:
+    """
+    This is used to look up how long a request waits on a topic's events.
+    Topics not configured must be acked before the response.
+    @params {topic} - The topic name.
+    @returns {object} - The durability class of the topic
+    """
+    # Events the client does not need before getting its tokens
+    default_durability = {
+        settings.api_assign_token: Durability.ack_after_response,
+        settings.api_update_token: Durability.ack_after_response,
+        settings.api_revoke_refresh_token_topic: Durability.ack_after_response,
+        settings.api_update_password_hash_topic: Durability.ack_after_response,
+        settings.api_logout_topic: Durability.best_effort,
+        settings.api_invalidate_cache_topic: Durability.best_effort,
+    }
+
+    durability = settings.api_event_durability.get(topic) or default_durability.get(topic, Durability.must_ack)
+    return Durability(durability)
+
+
+def track_event_delivery(topic: str, durability: Durability, future: asyncio.Future) -> None:
+    durability_stats[durability.value]['emitted'] += 1
+
+    def on_done(done: asyncio.Future) -> None:
+        if done.cancelled() or done.exception() is not None:
+            durability_stats[durability.value]['failed'] += 1
+            err = None if done.cancelled() else done.exception()
+            logger.error(f"Failed to produce event to topic:{topic} due to error: {str(err)}")
+        else:
+            durability_stats[durability.value]['acked'] += 1
+
+    future.add_done_callback(on_done)
+
+
+def record_dropped_event(topic: str, durability: Durability) -> None:
+    durability_stats[durability.value]['dropped'] += 1
+    logger.warning(f"Dropped {durability.value} event for topic:{topic}.")
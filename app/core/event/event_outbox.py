@@ -0,0 +1,225 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from core.connection.event_connection import get_producer
+from core.utils.settings import settings
+from core.utils.init_log import logger
+
+
+# Append-only SQLite outbox for events the broker could not ack in time
+outbox_db: sqlite3.Connection | None = None
+outbox_lock = threading.Lock()
+replay_task: asyncio.Task | None = None
+
+# Outbox counters
+outbox_stats = {
+    'pending': 0,
+    'appended': 0,
+    'replayed': 0,
+    'replay_failures': 0,
+    'oldest_created_on': None,
+}
+
+
+def get_event_outbox_stats() -> dict:
+    """
+    This is used to report the outbox size and replay lag.
+    @returns {dict} - The outbox counters
+    """
+    oldest = outbox_stats['oldest_created_on']
+    return {
+        'pending': outbox_stats['pending'],
+        'appended': outbox_stats['appended'],
+        'replayed': outbox_stats['replayed'],
+        'replay_failures': outbox_stats['replay_failures'],
+        'replay_lag_seconds': round(time.time() - oldest, 3) if oldest else 0,
+    }
+
+
+def has_pending_events() -> bool:
+    return outbox_stats['pending'] > 0
+
+
+def encode_headers(headers: tuple | None) -> str | None:
+    if not headers:
+        return None
+    return json.dumps([[name, value.hex()] for name, value in headers])
+
+
+def decode_headers(headers: str | None) -> list | None:
+    if not headers:
+        return None
+    return [(name, bytes.fromhex(value)) for name, value in json.loads(headers)]
+
+
+def open_event_outbox() -> None:
+    global outbox_db
+
+    if outbox_db is not None:
+        return
+
+    logger.info(f"Opening event outbox at {settings.api_event_outbox_path}.")
+    outbox_db = sqlite3.connect(settings.api_event_outbox_path, check_same_thread=False, isolation_level=None)
+    outbox_db.execute('PRAGMA journal_mode=WAL')
+    outbox_db.execute('PRAGMA synchronous=NORMAL')
+    outbox_db.execute(
+        'CREATE TABLE IF NOT EXISTS outbox ('
+        'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+        'topic TEXT NOT NULL, '
+        'key TEXT, '
+        'value BLOB NOT NULL, '
+        'headers TEXT, '
+        'created_on REAL NOT NULL)'
+    )
+
+    # Pick up events left over from a previous run
+    with outbox_lock:
+        pending, oldest = read_outbox_state()
+    outbox_stats['pending'] = pending
+    outbox_stats['oldest_created_on'] = oldest
+
+
+def close_event_outbox() -> None:
+    global outbox_db
+
+    if outbox_db is None:
+        return
+
+    logger.info('Closing event outbox.')
+    with outbox_lock:
+        outbox_db.close()
+        outbox_db = None
+
+
+def read_outbox_state() -> tuple:
+    # Rows are only ever deleted from the front, so ids stay contiguous
+    oldest_row = outbox_db.execute('SELECT id, created_on FROM outbox ORDER BY id LIMIT 1').fetchone()
+    if oldest_row is None:
+        return 0, None
+    last_id = outbox_db.execute('SELECT MAX(id) FROM outbox').fetchone()[0]
+    return last_id - oldest_row[0] + 1, oldest_row[1]
+
+
+def write_rows(rows: list[tuple]) -> tuple:
+    with outbox_lock:
+        outbox_db.executemany(
+            'INSERT INTO outbox (topic, key, value, headers, created_on) VALUES (?, ?, ?, ?, ?)',
+            rows
+        )
+        return read_outbox_state()
+
+
+def read_rows(limit: int) -> list[tuple]:
+    with outbox_lock:
+        return outbox_db.execute(
+            'SELECT id, topic, key, value, headers FROM outbox ORDER BY id LIMIT ?',
+            (limit,)
+        ).fetchall()
+
+
+def delete_rows(last_id: int) -> tuple:
+    with outbox_lock:
+        outbox_db.execute('DELETE FROM outbox WHERE id <= ?', (last_id,))
+        return read_outbox_state()
+
+
+async def append_to_outbox(events: list) -> None:
+    """
+    This is used to persist events, in order, until the broker recovers.
+    @params {events} - The queued events to persist.
+    """
+    now = time.time()
+    rows = [
+        (event.topic, event.key, event.value, encode_headers(event.headers), now)
+        for event in events
+    ]
+    pending, oldest = await asyncio.to_thread(write_rows, rows)
+
+    outbox_stats['pending'] = pending
+    outbox_stats['oldest_created_on'] = oldest
+    outbox_stats['appended'] += len(rows)
+
+    logger.warning(f"Saved {len(rows)} events to the outbox.")
+
+
+async def send_rows(rows: list[tuple]) -> list:
+    producer = await get_producer()
+
+    # Hand every event to the producer before waiting on acks
+    ack_futures = []
+    for _, topic, key, value, headers in rows:
+        ack_futures.append(await producer.send(
+            topic=topic,
+            value=value,
+            key=key.encode() if key is not None else None,
+            headers=decode_headers(headers)
+        ))
+
+    return await asyncio.gather(*ack_futures, return_exceptions=True)
+
+
+async def replay_outbox() -> int:
+    """
+    This is used to send the oldest outbox events and drop the acked ones.
+    @returns {int} - The number of events replayed
+    """
+    rows = await asyncio.to_thread(read_rows, settings.api_event_outbox_replay_batch_size)
+    if not rows:
+        return 0
+
+    try:
+        acks = await asyncio.wait_for(send_rows(rows=rows), timeout=settings.api_event_ack_timeout)
+    except Exception as err:
+        acks = [err] * len(rows)
+
+    # Only drop the acked prefix so replay stays in order
+    replayed = 0
+    for ack in acks:
+        if isinstance(ack, BaseException):
+            outbox_stats['replay_failures'] += 1
+            break
+        replayed += 1
+
+    if replayed:
+        pending, oldest = await asyncio.to_thread(delete_rows, rows[replayed - 1][0])
+        outbox_stats['pending'] = pending
+        outbox_stats['oldest_created_on'] = oldest
+        outbox_stats['replayed'] += replayed
+        logger.info(f"Replayed {replayed} events from the outbox.")
+
+    return replayed
+
+
+async def replay_outbox_periodically() -> None:
+    while True:
+        replayed = 0
+        if has_pending_events():
+            try:
+                replayed = await replay_outbox()
+            except Exception as err:
+                logger.error(f"Failed to replay outbox due to error: {str(err)}", exc_info=1)
+
+        # Keep draining while the broker is keeping up
+        if not replayed:
+            await asyncio.sleep(settings.api_event_outbox_replay_interval)
+
+
+async def start_event_outbox() -> None:
+    global replay_task
+
+    await asyncio.to_thread(open_event_outbox)
+
+    if replay_task is None:
+        replay_task = asyncio.create_task(replay_outbox_periodically())
+
+
+async def stop_event_outbox() -> None:
+    global replay_task
+
+    if replay_task is not None:
+        replay_task.cancel()
+        replay_task = None
+
+    await asyncio.to_thread(close_event_outbox)
@@ -0,0 +1,243 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from core.connection.event_connection import get_producer
+from core.helper.producer_helper import topic_exists, create_topic
+from core.event.event_outbox import append_to_outbox, has_pending_events
+from core.utils.settings import settings
+from core.utils.init_log import logger
+
+
+@dataclass
+class QueuedEvent:
+    topic: str
+    value: bytes
+    key: str | None = None
+    headers: tuple | None = None
+    future: asyncio.Future | None = None
+    queued_on: float = field(default_factory=time.monotonic)
+
+
+# Bounded in-process event queue and its drain task
+event_queue: asyncio.Queue | None = None
+drain_task: asyncio.Task | None = None
+
+# Held while a batch is taken from the queue and delivered, so overflow to the outbox keeps event order
+send_lock = asyncio.Lock()
+
+# Pipeline counters
+pipeline_stats = {
+    'batches_sent': 0,
+    'events_sent': 0,
+    'events_failed': 0,
+    'last_batch_size': 0,
+    'max_batch_size': 0,
+    'events_outboxed': 0,
+}
+
+
+def get_event_pipeline_stats() -> dict:
+    """
+    This is used to report the event pipeline queue depth and batch sizes.
+    @returns {dict} - The pipeline counters
+    """
+    batches_sent = pipeline_stats['batches_sent']
+    return {
+        'queue_depth': event_queue.qsize() if event_queue else 0,
+        'queue_capacity': settings.api_event_queue_size,
+        'avg_batch_size': round(pipeline_stats['events_sent'] / batches_sent, 2) if batches_sent else 0,
+        **pipeline_stats,
+    }
+
+
+def is_event_pipeline_running() -> bool:
+    return drain_task is not None and not drain_task.done()
+
+
+async def start_event_pipeline() -> None:
+    global event_queue, drain_task
+
+    if is_event_pipeline_running():
+        return
+
+    logger.info('Starting event pipeline.')
+    event_queue = asyncio.Queue(maxsize=settings.api_event_queue_size)
+    drain_task = asyncio.create_task(drain_event_queue())
+
+
+async def stop_event_pipeline() -> None:
+    global drain_task
+
+    if not is_event_pipeline_running():
+        return
+
+    # Give queued events a chance to go out
+    logger.info('Draining event pipeline.')
+    try:
+        await asyncio.wait_for(event_queue.join(), timeout=settings.api_event_shutdown_timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Event pipeline stopped with {event_queue.qsize()} queued events.")
+
+    drain_task.cancel()
+    drain_task = None
+
+
+async def emit_event(topic: str, value: bytes, key: str | None = None, headers: tuple | None = None) -> asyncio.Future:
+    """
+    This is used to queue a serialized event for batched delivery.
+    Waits for space when the queue is full, up to the ack deadline, then saves the queued events
+    and this one to the outbox, in order. Later events follow them through the outbox until it is replayed.
+    @params {topic} - The topic to produce to.
+    @params {value} - The serialized event.
+    @returns {object} - A future resolved once the broker acks the event or it is saved to the outbox
+    """
+    future = asyncio.get_running_loop().create_future()
+    event = QueuedEvent(topic=topic, value=value, key=key, headers=headers, future=future)
+
+    # Back pressure when the queue is full, bounded by the ack deadline
+    try:
+        await asyncio.wait_for(event_queue.put(event), timeout=settings.api_event_ack_timeout)
+    except asyncio.TimeoutError:
+        logger.warning('Event queue is full.')
+        async with send_lock:
+            # Older queued events go to the outbox first
+            queued_events = take_queued_events()
+            try:
+                await outbox_events(events=[*queued_events, event])
+            finally:
+                for _ in queued_events:
+                    event_queue.task_done()
+
+    return future
+
+
+def take_queued_events() -> list[QueuedEvent]:
+    events = []
+    while not event_queue.empty():
+        events.append(event_queue.get_nowait())
+    return events
+
+
+def emit_event_nowait(topic: str, value: bytes, key: str | None = None, headers: tuple | None = None) -> asyncio.Future | None:
+    """
+    This is used to queue a serialized event without waiting for queue space.
+    @params {topic} - The topic to produce to.
+    @params {value} - The serialized event.
+    @returns {object} - A future resolved once the event is delivered, or None when the queue is full
+    """
+    future = asyncio.get_running_loop().create_future()
+    event = QueuedEvent(topic=topic, value=value, key=key, headers=headers, future=future)
+
+    try:
+        event_queue.put_nowait(event)
+    except asyncio.QueueFull:
+        return None
+
+    return future
+
+
+async def outbox_events(events: list[QueuedEvent]) -> None:
+    try:
+        await append_to_outbox(events=events)
+    except Exception as err:
+        logger.error(f"Failed to save events to the outbox due to error: {str(err)}", exc_info=1)
+        for event in events:
+            pipeline_stats['events_failed'] += 1
+            if not event.future.done():
+                event.future.set_exception(err)
+        return
+
+    # Events in the outbox count as delivered
+    pipeline_stats['events_outboxed'] += len(events)
+    for event in events:
+        if not event.future.done():
+            event.future.set_result(None)
+
+
+async def collect_batch() -> list[QueuedEvent]:
+    # Wait for the first event
+    batch = [await event_queue.get()]
+    deadline = time.monotonic() + settings.api_event_linger_ms / 1000
+
+    # Linger for more events until the batch is full
+    while len(batch) < settings.api_event_batch_size:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(event_queue.get(), timeout=timeout))
+        except asyncio.TimeoutError:
+            break
+
+    return batch
+
+
+async def send_events(topic: str, events: list[QueuedEvent]) -> list:
+    producer = await get_producer()
+
+    # Check if topic already exists
+    if not await topic_exists(topic=topic):
+        logger.info(f"Topic: {topic} not found.")
+        await create_topic(topic=topic)
+
+    # Hand every event to the producer before waiting on acks
+    ack_futures = []
+    for event in events:
+        key = event.key.encode() if event.key is not None else None
+        ack_futures.append(await producer.send(topic=topic, value=event.value, key=key, headers=event.headers))
+
+    return await asyncio.gather(*ack_futures, return_exceptions=True)
+
+
+async def send_batch(batch: list[QueuedEvent]) -> None:
+    # Keep ordering behind events still waiting in the outbox
+    if has_pending_events():
+        await outbox_events(events=batch)
+        return
+
+    # Group events per topic, keeping their order
+    events_by_topic: dict[str, list[QueuedEvent]] = {}
+    for event in batch:
+        events_by_topic.setdefault(event.topic, []).append(event)
+
+    for topic, events in events_by_topic.items():
+        # Wait for the broker acks up to the deadline
+        try:
+            acks = await asyncio.wait_for(send_events(topic=topic, events=events), timeout=settings.api_event_ack_timeout)
+        except Exception as err:
+            logger.warning(f"Broker did not ack events for topic:{topic}: {str(err)}")
+            acks = [err] * len(events)
+
+        # Resolve the acked events and keep the rest in the outbox
+        unacked = []
+        for event, ack in zip(events, acks):
+            if isinstance(ack, BaseException):
+                unacked.append(event)
+            else:
+                pipeline_stats['events_sent'] += 1
+                if not event.future.done():
+                    event.future.set_result(ack)
+
+        if unacked:
+            await outbox_events(events=unacked)
+
+
+async def drain_event_queue() -> None:
+    while True:
+        async with send_lock:
+            batch = await collect_batch()
+
+            try:
+                await send_batch(batch=batch)
+            except Exception as err:
+                logger.error(f"Failed to send event batch due to error: {str(err)}", exc_info=1)
+                for event in batch:
+                    if not event.future.done():
+                        pipeline_stats['events_failed'] += 1
+                        event.future.set_exception(err)
+            finally:
+                pipeline_stats['batches_sent'] += 1
+                pipeline_stats['last_batch_size'] = len(batch)
+                pipeline_stats['max_batch_size'] = max(pipeline_stats['max_batch_size'], len(batch))
+                for _ in batch:
+                    event_queue.task_done()
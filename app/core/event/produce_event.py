@@ -1,21 +1,32 @@
-from aiokafka import AIOKafkaProducer
-from core.utils.settings import settings
-import uuid
+from fastapi import BackgroundTasks
+from core.connection.event_connection import get_producer
+from core.event.event_pipeline import emit_event, emit_event_nowait, is_event_pipeline_running
+from core.event.event_durability import get_topic_durability, track_event_delivery, record_dropped_event
+from core.enums.event_enum import Durability
 from core.helper.producer_helper import *
 from core.utils.init_log import logger
 
 
-async def produce_event(topic: str, value, key: str = str(uuid.uuid4()), headers: tuple | None = None) -> None:
+async def send_event(topic: str, value, key: str | None, headers: tuple | None, durability: Durability, wait_for_ack: bool) -> None:
     try:
-        # Get the producer
-        producer = AIOKafkaProducer(
-            client_id=settings.api_event_streaming_client_id,
-            bootstrap_servers=settings.api_event_streaming_host, 
-        )
+        # Queue the event for batched delivery
+        if is_event_pipeline_running():
+            if durability == Durability.best_effort:
+                future = emit_event_nowait(topic=topic, value=value, key=key, headers=headers)
+            else:
+                future = await emit_event(topic=topic, value=value, key=key, headers=headers)
 
-        # Start the producer and get brokers metedata
-        logger.info('Starting kafka producer.')
-        await producer.start()
+            if future is None:
+                record_dropped_event(topic=topic, durability=durability)
+                return
+
+            track_event_delivery(topic=topic, durability=durability, future=future)
+            if wait_for_ack:
+                await future
+            return
+
+        # Get the shared producer
+        producer = await get_producer()
 
         # Check if topic already exists
         topic_exist = await topic_exists(topic=topic)
@@ -25,10 +36,24 @@ async def produce_event(topic: str, value, key: str = str(uuid.uuid4()), headers
             await create_topic(topic=topic)
 
         # Produce message
-        await producer.send_and_wait(key=key.encode(), value=value, topic=topic, headers=headers)
+        await producer.send_and_wait(key=key.encode() if key is not None else None, value=value, topic=topic, headers=headers)
 
     except Exception as err:
-        logger.error(f"Failed to start Kafka producer due to error: {str(err)}", exc_info=1)
-    finally:
-        logger.info('Closing Kafka producer.')
-        await producer.stop()
\ No newline at end of file
+        logger.error(f"Failed to produce event to topic:{topic} due to error: {str(err)}", exc_info=1)
+
+
+async def produce_event(topic: str, value, key: str | None = None, headers: tuple | None = None, background_tasks: BackgroundTasks | None = None) -> None:
+    durability = get_topic_durability(topic=topic)
+
+    # Hold the response until the broker acks
+    if durability == Durability.must_ack:
+        await send_event(topic=topic, value=value, key=key, headers=headers, durability=durability, wait_for_ack=True)
+        return
+
+    # Send after the response goes out
+    if background_tasks is not None:
+        wait_for_ack = durability == Durability.ack_after_response
+        background_tasks.add_task(send_event, topic=topic, value=value, key=key, headers=headers, durability=durability, wait_for_ack=wait_for_ack)
+        return
+
+    await send_event(topic=topic, value=value, key=key, headers=headers, durability=durability, wait_for_ack=False)
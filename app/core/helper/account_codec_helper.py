@@ -0,0 +1,94 @@
+import io
+from fastavro import parse_schema, schemaless_writer, schemaless_reader
+from core.utils.settings import settings
+
+
+# Magic byte in front of every cached account
+ACCOUNT_CODEC_MAGIC = b'\xac'
+
+# Cached account layout. Bump account_model_version whenever it changes,
+# entries written with another version are then treated as cache misses.
+ACCOUNT_CACHE_SCHEMA = parse_schema({
+    'type': 'record',
+    'name': 'AccountCache',
+    'fields': [
+        {'name': '_id', 'type': 'string'},
+        {'name': 'email', 'type': 'string'},
+        {'name': 'firstname', 'type': 'string'},
+        {'name': 'lastname', 'type': 'string'},
+        {'name': 'phone_number', 'type': 'string'},
+        {'name': 'country_code', 'type': 'string'},
+        {'name': 'country', 'type': 'string'},
+        {'name': 'username', 'type': ['null', 'string'], 'default': None},
+        {'name': 'display_pics', 'type': ['null', 'string'], 'default': None},
+        {'name': 'hashed_password', 'type': 'string'},
+        {'name': 'version', 'type': 'long'},
+        {'name': 'disabled', 'type': 'boolean', 'default': True},
+        {'name': 'email_verified', 'type': 'boolean', 'default': False},
+        {'name': 'phone_verified', 'type': 'boolean', 'default': False},
+        {'name': 'is_active', 'type': 'boolean', 'default': False},
+        {'name': 'active_device_count', 'type': 'long', 'default': 0},
+        {'name': 'active_devices', 'type': {'type': 'array', 'items': 'string'}, 'default': []},
+        {'name': 'role', 'type': {
+            'type': 'record',
+            'name': 'AccountCacheRole',
+            'fields': [
+                {'name': 'name', 'type': 'string'},
+                {'name': 'permissions', 'type': {'type': 'array', 'items': 'string'}, 'default': []},
+            ],
+        }},
+        {'name': 'created_on', 'type': {'type': 'long', 'logicalType': 'timestamp-millis'}},
+        {'name': 'tokens', 'type': {'type': 'array', 'items': 'string'}, 'default': []},
+    ],
+})
+
+
+def encode_varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def decode_varint(buffer: io.BytesIO) -> int | None:
+    value, shift = 0, 0
+    while True:
+        byte = buffer.read(1)
+        if not byte:
+            return None
+        value |= (byte[0] & 0x7f) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+def encode_account(data: dict) -> bytes:
+    """
+    This is used to encode an account document for the cache.
+    @params {data} - The account document, keyed as in the database ('_id').
+    @returns {bytes} - A version header followed by the Avro encoded account
+    """
+    buffer = io.BytesIO()
+    buffer.write(ACCOUNT_CODEC_MAGIC)
+    buffer.write(encode_varint(settings.account_model_version))
+    schemaless_writer(buffer, ACCOUNT_CACHE_SCHEMA, data)
+    return buffer.getvalue()
+
+
+def decode_account(data: bytes) -> dict | None:
+    """
+    This is used to decode a cached account document.
+    @params {data} - The cached account bytes.
+    @returns {dict} - The account document, or None if it was written in another format or version
+    """
+    if not data or data[:1] != ACCOUNT_CODEC_MAGIC:
+        return None
+
+    buffer = io.BytesIO(data)
+    buffer.seek(1)
+    if decode_varint(buffer) != settings.account_model_version:
+        return None
+
+    return schemaless_reader(buffer, ACCOUNT_CACHE_SCHEMA, None)
@@ -1,7 +1,7 @@
 from pydantic import EmailStr
-from fastapi import Request, HTTPException, status
+from fastapi import Request, HTTPException, status, BackgroundTasks
 from core.model.account_model import AccountInDB
-from core.helper.token_helper import verify_token
+from core.helper.token_helper import verify_access_token
 from core.utils.settings import settings
 from core.utils.init_log import logger
 from core.model.cache_model import Cache
@@ -14,24 +14,11 @@ from core.helper.db_helper import *
 from core.helper.encryption_helper import encrypt
 from core.utils.error import credential_error
 from core.model.device_model import *
-from core.helper.cache_helper import get_account_from_cache
-
-
-async def cache_account(data: dict) -> None:
-    account_obj = AccountInDB(**data)
-    # Serialize
-    account_event = account_obj.serialize()
-
-    # Create cache model
-    key = f"account:{account_obj.email}"
-    cache_obj = Cache(key=key, data=account_event) 
-
-    # Serialize cache
-    cache_event = cache_obj.serialize()
-
-    # Emit event
-    logger.info('Emitting account cache event.')
-    await produce_event(topic=settings.api_cache_topic, value=cache_event)
+from core.helper.cache_helper import get_account_from_cache, get_account_from_cache_by_identifier, refill_account_cache, invalidate_account_cache
+from core.helper.codec_helper import serialize_event
+from core.helper.local_cache_helper import account_local_cache
+from core.helper.negative_cache_helper import is_missing_account, remember_missing_account
+from core.helper.token_session_helper import create_token_session
 
 
 async def get_current_active_account(request: Request) -> dict:
@@ -54,7 +41,7 @@ async def get_current_active_account(request: Request) -> dict:
         raise credential_error
     
     # Verify access token
-    current_account = await verify_token(token=access_token, secret=settings.api_access_token_secret)
+    current_account = verify_access_token(token=access_token)
     if not current_account:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,19 +52,50 @@ async def get_current_active_account(request: Request) -> dict:
 
 
 
-async def authenticate_account(device_ip: str, data, auth_type: str) -> AccountInDB:
+async def get_account_for_login(field: str, value: str) -> tuple[AccountLogin | None, bool]:
+    """
+    This is used to read an account by login identifier through the cache.
+    The caller fills the cache on a miss, once it knows whether the password hash changes.
+    @params {field} - The identifier field, 'email' or 'phone_number'.
+    @params {value} - The identifier used to log in.
+    @returns {tuple} - The account fields used by login, or None if it does not exist, and whether it was cached
+    """
+    # Check the cache first
+    account_data = await get_account_from_cache_by_identifier(field=field, value=value)
+
+    if account_data is not None:
+        return AccountLogin(**account_data), True
+
+    # Read only the fields login needs
+    if field == 'email':
+        account = await get_account_by_email(email=value)
+    else:
+        account = await get_account_by_phone_number(phone_number=value)
+    return account, False
+
+
+async def authenticate_account(device_ip: str, data, auth_type: str, background_tasks: BackgroundTasks | None = None) -> AccountLogin:
     # initialize account dict
-    account_exists = {}
+    account_exists, is_cached = {}, False
+    identifier = data.email if auth_type == AuthType.email.value else data.phone_number
+
+    # Skip the database for identifiers known to have no account
+    if await is_missing_account(identifier=identifier):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Account not found"
+        )
 
     # Validate email
     if auth_type == AuthType.email.value:
-        account_exists = await get_account_by_email(email=data.email)
+        account_exists, is_cached = await get_account_for_login(field='email', value=data.email)
     elif auth_type == AuthType.phone.value:
-        account_exists = await get_account_by_phone_number(phone_number=data.phone_number)
+        account_exists, is_cached = await get_account_for_login(field='phone_number', value=data.phone_number)
   
     # Check if account exists
     logger.info('Checking if account exists.')
     if not account_exists:
+        await remember_missing_account(identifier=identifier)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Account not found"
@@ -117,23 +135,40 @@ async def authenticate_account(device_ip: str, data, auth_type: str) -> AccountI
  
     # Verifying password
     logger.info('Verifying password')
-    is_valid = verify_password(hashed_password=account_exists.hashed_password, plain_password=data.password)
+    is_valid, new_hashed_password = await verify_and_update_password_in_pool(hashed_password=account_exists.hashed_password, plain_password=data.password)
     if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid password"
         )
 
+    # Upgrade the hash to the current password policy, the cache is written with the new hash
+    if new_hashed_password:
+        await update_password_hash(id=account_exists.id, hashed_password=new_hashed_password, background_tasks=background_tasks)
+    elif not is_cached:
+        # Fill the cache for the next login, off the hot path
+        await refill_account_cache(id=account_exists.id, background_tasks=background_tasks)
+
     return account_exists
   
 
-async def logout_event(email: EmailStr, token: str):
-    # Create obj
-    logout_obj = Logout(email=email, refresh_token=token)
+async def update_password_hash(id: str, hashed_password: str, background_tasks: BackgroundTasks | None = None) -> None:
+    # The cached account still holds the old hash, and the database may not have the new one yet
+    await invalidate_account_cache(id=id, background_tasks=background_tasks)
+    await refill_account_cache(id=id, background_tasks=background_tasks, hashed_password=hashed_password)
+
+    # Serialize update password hash event
+    update_password_hash_event = serialize_event(UpdatePasswordHash, {'id': id, 'hashed_password': hashed_password})
 
-    # Serialize
-    logout_event = logout_obj.serialize()
-    await produce_event(topic=settings.api_logout_topic, value=logout_event)
+    # Emit event
+    logger.info('Emitting update password hash event.')
+    await produce_event(topic=settings.api_update_password_hash_topic, value=update_password_hash_event, key=id, background_tasks=background_tasks)
+
+
+async def logout_event(email: EmailStr, token: str, background_tasks: BackgroundTasks | None = None):
+    # Serialize logout event
+    logout_event = serialize_event(Logout, {'email': email, 'refresh_token': token})
+    await produce_event(topic=settings.api_logout_topic, value=logout_event, key=email, background_tasks=background_tasks)
 
 
 def has_token(request: Request) -> str:
@@ -158,25 +193,28 @@ def has_token(request: Request) -> str:
     return token
 
 
-async def update_account(email: EmailStr, id: str, device_ip: str, token: str, device_data):
+async def update_account(email: EmailStr, id: str, device_ip: str, token: str, device_data, background_tasks: BackgroundTasks | None = None):
     # Encrypt refresh token
     logger.info('Encypting refresh token')
     encrypted_token = encrypt(value=token)
 
-    # Create assign token obj
-    assign_token_obj = AssignToken(
-        id=id,
-        email=email,
-        device_ip=device_ip,
-        token=encrypted_token,
-        device_info=device_data
-    )
-    
-    # Serialize
-    assign_token_event = assign_token_obj.serialize()
+    # Drop the stale local account
+    account_local_cache.invalidate(id)
+
+    # Record the session before the token is handed out
+    await create_token_session(id=id, encrypted_token=encrypted_token, device_ip=device_ip)
+
+    # Serialize assign token event
+    assign_token_event = serialize_event(AssignToken, {
+        'id': id,
+        'email': email,
+        'device_ip': device_ip,
+        'token': encrypted_token,
+        'device_info': device_data.model_dump()
+    })
 
     # Emit event
     logger.info('Emitting assign token event.')
-    await produce_event(topic=settings.api_assign_token, value=assign_token_event)
+    await produce_event(topic=settings.api_assign_token, value=assign_token_event, key=id, background_tasks=background_tasks)
 
 
@@ -0,0 +1,51 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter. Lookups may return false positives, never false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # Size the bit array and hash count for the target false-positive rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(math.ceil(self.size / 8))
+        self.count = 0
+
+    def get_positions(self, item: str):
+        # Double hashing from one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self.get_positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.get_positions(item))
+
+    def get_false_positive_rate(self) -> float:
+        """
+        This is used to estimate the current false-positive rate from the number of items added.
+        @returns {float} - The estimated false-positive rate
+        """
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def get_stats(self) -> dict:
+        return {
+            'items': self.count,
+            'capacity': self.capacity,
+            'size_bytes': len(self.bits),
+            'hash_count': self.hash_count,
+            'target_false_positive_rate': self.error_rate,
+            'estimated_false_positive_rate': round(self.get_false_positive_rate(), 6),
+        }
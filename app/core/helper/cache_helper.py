@@ -4,18 +4,112 @@ from core.connection.cache_connection import redis
 import logging
 from datetime import timedelta, timezone
 from core.utils.settings import settings
-from core.model.cache_model import Cache
+from core.model.cache_model import Cache, InvalidateCache
 from core.event.produce_event import produce_event
 from core.utils.init_log import logger
 from core.helper.encryption_helper import encrypt
 from core.model.otp_model import OTP
-from fastapi import HTTPException, status
-import json
+from core.helper.codec_helper import deserialize_event, serialize_event, serialize_cache_event, get_field_layout
+from core.helper.account_codec_helper import encode_account, decode_account
+from core.helper.db_helper import get_account_document
+from core.enums.cache_enum import ConsumeResult
+from core.helper.local_cache_helper import account_local_cache, account_index_local_cache
+from core.event.consume_event import register_event_handler
+from core.helper.revoked_token_filter_helper import might_be_revoked, record_false_positive
+from fastapi import HTTPException, status, BackgroundTasks
+from dataclasses_avroschema.pydantic import AvroBaseModel
+
+
+# Atomically checks a single-use entry's expiry and deletes it.
+# ARGV[1] is the current time in the unit of the expiry field and ARGV[2]
+# lists the Avro fields encoded in front of it ('s' string, 'l' long, 'b' boolean).
+# An empty layout skips the expiry check and returns the entry instead.
+CONSUME_CACHE_ENTRY_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return {0}
+end
+redis.call('DEL', KEYS[1])
+
+local layout = ARGV[2]
+if layout == '' then
+    return {1, value}
+end
+
+local pos = 1
+local function read_long()
+    local result, multiplier = 0, 1
+    while true do
+        local byte = string.byte(value, pos)
+        pos = pos + 1
+        result = result + (byte % 128) * multiplier
+        if byte < 128 then
+            break
+        end
+        multiplier = multiplier * 128
+    end
+    if result % 2 == 0 then
+        return result / 2
+    end
+    return -(result + 1) / 2
+end
+
+for i = 1, #layout do
+    local kind = string.sub(layout, i, i)
+    if kind == 's' then
+        local length = read_long()
+        pos = pos + length
+    elseif kind == 'b' then
+        pos = pos + 1
+    else
+        read_long()
+    end
+end
+
+if tonumber(ARGV[1]) >= read_long() then
+    return {2}
+end
+return {1}
+"""
+
+consume_cache_entry_script = redis.register_script(CONSUME_CACHE_ENTRY_SCRIPT)
+
+
+async def consume_cache_entry(key: str, model: type[AvroBaseModel], expiry_field: str) -> ConsumeResult:
+    """
+    This is used to validate and delete a single-use cache entry in one atomic call.
+    @params {key} - The cache key.
+    @params {model} - The model class the entry was serialized with.
+    @params {expiry_field} - The timestamp field holding the entry expiry.
+    @returns {object} - Whether the entry was missing, valid or expired
+    """
+    layout = get_field_layout(model, expiry_field)
+    now = datetime.now(timezone.utc)
+
+    if layout is None:
+        # Fall back to checking expiry here, after the atomic delete
+        response = await consume_cache_entry_script(keys=[key.encode()], args=[0, ''])
+        if response[0] == ConsumeResult.missing:
+            return ConsumeResult.missing
+        entry = deserialize_event(model, response[1])
+        return ConsumeResult.expired if now >= entry[expiry_field] else ConsumeResult.valid
+
+    fields, logical_type = layout
+    scale = 1_000_000 if logical_type == 'timestamp-micros' else 1000
+    response = await consume_cache_entry_script(keys=[key.encode()], args=[int(now.timestamp() * scale), fields])
+
+    return ConsumeResult(response[0])
 
 
 async def get_account_from_cache(id: str):
     logger.info(f'Fetching account:{id} from cache')
 
+    # Check the in-process cache first
+    account_data = account_local_cache.get(id)
+    if account_data is not None:
+        logger.info(f"Account:{id} found in local cache.")
+        return account_data
+
     # Create key
     key = f"account:{id}"
 
@@ -31,13 +125,115 @@ async def get_account_from_cache(id: str):
         logger.info(f"Deserializing account:{id}")
         
         # Deserialize
-        account_data = json.loads(s=account_bytes)
+        account_data = decode_account(data=account_bytes)
+        if account_data is None:
+            logger.warning(f"Account:{id} cached in an outdated format.")
+            return None
+
+        # Keep it in-process for the next lookup
+        account_local_cache.set(id, account_data)
 
         return account_data
     except Exception as err:
         logger.error(f"Failed to retrieve account:{id} from cache due to error:{str(err)}")
 
 
+async def get_account_from_cache_by_identifier(field: str, value: str):
+    """
+    This is used to find a cached account by a login identifier through the secondary index.
+    @params {field} - The identifier field, 'email' or 'phone_number'.
+    @params {value} - The identifier used to log in.
+    @returns {dict} - The cached account document, or None on a miss
+    """
+    index_key = f"{field}:{value}"
+
+    try:
+        # Resolve the account id
+        id = account_index_local_cache.get(index_key)
+        if id is None:
+            id_bytes = await redis.get(f"account_index:{index_key}".encode())
+            if not id_bytes:
+                logger.warning(f"Account index:{field} not found in cache.")
+                return None
+            id = id_bytes.decode()
+            account_index_local_cache.set(index_key, id)
+    except Exception as err:
+        logger.error(f"Failed to retrieve account index from cache due to error:{str(err)}")
+        return None
+
+    account_data = await get_account_from_cache(id=id)
+
+    # The index can outlive an identifier change
+    if account_data is None or account_data.get(field) != value:
+        account_index_local_cache.invalidate(index_key)
+        return None
+
+    return account_data
+
+
+async def cache_account(data: dict) -> None:
+    """
+    This is used to cache an account and its login identifiers. The entries expire after
+    api_account_cache_ttl, so changes made by other services are picked up within that time.
+    @params {data} - The account document, keyed as in the database ('_id').
+    """
+    id = data['_id']
+
+    try:
+        logger.info(f"Caching account:{id}.")
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.set(f"account:{id}".encode(), encode_account(data=data), ex=settings.api_account_cache_ttl)
+            for field in ('email', 'phone_number'):
+                pipe.set(f"account_index:{field}:{data[field]}".encode(), id.encode(), ex=settings.api_account_cache_ttl)
+            await pipe.execute()
+    except Exception as err:
+        logger.error(f"Failed to cache account:{id} due to error: {str(err)}")
+
+
+async def fill_account_cache(id: str, hashed_password: str | None = None) -> None:
+    """
+    This is used to fill the account cache from the database, usually after the response went out.
+    @params {id} - The account id.
+    @params {hashed_password} - A new password hash the database may not have applied yet.
+    """
+    try:
+        account_data = await get_account_document(id=id)
+    except Exception as err:
+        logger.error(f"Failed to read account:{id} for the cache due to error: {str(err)}")
+        return
+
+    if account_data:
+        if hashed_password is not None:
+            account_data['hashed_password'] = hashed_password
+        await cache_account(data=account_data)
+
+
+async def refill_account_cache(id: str, background_tasks: BackgroundTasks | None = None, hashed_password: str | None = None) -> None:
+    # Refill after the response when possible, the request should not wait on the full document
+    if background_tasks is not None:
+        background_tasks.add_task(fill_account_cache, id=id, hashed_password=hashed_password)
+    else:
+        await fill_account_cache(id=id, hashed_password=hashed_password)
+
+
+async def invalidate_account_cache(id: str, background_tasks: BackgroundTasks | None = None) -> None:
+    """
+    This is used to drop a cached account everywhere after it changed, e.g. its password hash.
+    @params {id} - The account id.
+    """
+    key = f"account:{id}"
+    account_local_cache.invalidate(id)
+
+    try:
+        await redis.delete(key.encode())
+    except Exception as err:
+        logger.error(f"Failed to invalidate account:{id} in cache due to error: {str(err)}")
+
+    # Other instances drop their local copy
+    invalidate_cache_event = serialize_event(InvalidateCache, {'key': key})
+    await produce_event(topic=settings.api_invalidate_cache_topic, value=invalidate_cache_event, key=id, background_tasks=background_tasks)
+
+
 async def auth_token_exists(auth_token: str, email: EmailStr) -> dict:
     key = f"auth_token:{email}-{auth_token}"
     try:
@@ -57,7 +253,13 @@ async def is_revoked_token(token: str, account_id: str) -> dict:
     # Encrypt token
     encrypted_otp = encrypt(value=token)
 
-    key = f"refresh_token:{account_id}-{encrypted_otp}"
+    fingerprint = f"{account_id}-{encrypted_otp}"
+    key = f"refresh_token:{fingerprint}"
+
+    # Skip the lookup for tokens that were never revoked
+    if not might_be_revoked(fingerprint=fingerprint):
+        logger.info('Refresh token valid.')
+        return False
     
     try:
         logger.info('Fetching revoked token')
@@ -65,6 +267,7 @@ async def is_revoked_token(token: str, account_id: str) -> dict:
         if revoked_token:
             logger.info('Refresh token was revoked.')
             return True
+        record_false_positive()
         logger.info('Refresh token valid.')
         return False        
     except Exception as err:
@@ -72,6 +275,42 @@ async def is_revoked_token(token: str, account_id: str) -> dict:
         return False
     
 
+async def are_revoked_tokens(tokens: list[tuple[str, str]]) -> list[bool]:
+    """
+    This is used to check many refresh tokens for revocation in a single pipelined round trip.
+    @params {tokens} - The (token, account_id) pairs to check.
+    @returns {list} - Whether each token was revoked, in the same order
+    """
+    revoked = [False] * len(tokens)
+
+    # Only tokens the filter cannot rule out need a lookup
+    lookups = []
+    for index, (token, account_id) in enumerate(tokens):
+        fingerprint = f"{account_id}-{encrypt(value=token)}"
+        if might_be_revoked(fingerprint=fingerprint):
+            lookups.append((index, f"refresh_token:{fingerprint}"))
+
+    if not lookups:
+        return revoked
+
+    try:
+        logger.info(f'Fetching {len(lookups)} revoked tokens')
+        async with redis.pipeline(transaction=False) as pipe:
+            for _, key in lookups:
+                pipe.exists(key.encode())
+            results = await pipe.execute()
+    except Exception as err:
+        logger.error(f'Failed to verify refresh tokens due to err{str(err)}.', exc_info=1)
+        return revoked
+
+    for (index, _), exists in zip(lookups, results):
+        revoked[index] = bool(exists)
+        if not exists:
+            record_false_positive()
+
+    return revoked
+
+
 async def is_valid_otp(verify_otp: VerifyOTP):
     # Encrypt OTP
     encrypted_otp = encrypt(value=verify_otp.one_time_password)
@@ -79,61 +318,45 @@ async def is_valid_otp(verify_otp: VerifyOTP):
     # Retrieve the otp
     key = f"otp:{verify_otp.email}-{encrypted_otp}-{verify_otp.purpose.lower()}"
     try:  
-        logger.info('fetching one time password.')
+        logger.info('Consuming one time password.')
         
-        # Fetch otp
-        otp_exists_bytes = await redis.get(key.encode())
+        # Check and delete the otp in one call
+        result = await consume_cache_entry(key=key, model=OTP, expiry_field='expires_on')
+    except Exception as err:
+        logger.error(f'Failed to validate OTP due to error {str(err)}')
+        return None
         
-        # Check if otp does not exists
-        if not otp_exists_bytes:
-            raise HTTPException(
+    # Check if otp does not exists
+    if result == ConsumeResult.missing:
+        raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Invalid one-time-password'
         )
+
+    # Check if OTP have expired
+    if result == ConsumeResult.expired:
+        logger.info('Expired OTP')
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expired One-Time-Password"
+        )
         
-        logger.info('OTP found.')
-        
-        # Deserialize OTP
-        otp_obj = OTP.deserialize(data=otp_exists_bytes)
-
-        # Check if OTP have expired
-        logger.info('Checking if OTP have expired.')
-
-        if datetime.now(timezone.utc) >= otp_obj.expires_on:
-            logger.info('Expired OTP')
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Expired One-Time-Password"
-            )
-        
-        return True
-            
-    except Exception as err:
-        logger.error(f'Failed to validate OTP due to error {str(err)}')
+    return True
 
 
 async def cache_auth_token_event(token: str, email: EmailStr):
-    # Create auth token obj
-    auth_token_obj = AuthToken(
-        token=token,
-        email=email,
-        expiry= datetime.utcnow() + timedelta(seconds=settings.api_auth_token_expiry)
-    )
-
-    # Serialize
-    auth_token_event = auth_token_obj.serialize()
-
     # Create cache key
     key = f"auth_token:{email}-{token}"
 
-    # Create cache obj
-    cache_obj = Cache(key=key, data=auth_token_event)
-
-    # Serialize cache
-    cache_event = cache_obj.serialize()
+    # Serialize auth token wrapped in a cache event
+    cache_event = serialize_cache_event(key=key, model=AuthToken, data={
+        'token': token,
+        'email': email,
+        'expiry': datetime.now(timezone.utc) + timedelta(seconds=settings.api_auth_token_expiry)
+    })
 
     # Emit event
-    await produce_event(topic=settings.api_cache_topic, value=cache_event)
+    await produce_event(topic=settings.api_cache_topic, value=cache_event, key=email)
 
 
 async def is_valid_auth_token(email: EmailStr, token: str) -> None:
@@ -144,25 +367,65 @@ async def is_valid_auth_token(email: EmailStr, token: str) -> None:
     key = f"auth_token:{email}-{encrypted_token}"
 
     try:
-        # Get the auth token if it exists
-        auth_token_byte = await redis.get(key.encode()) 
+        # Check and delete the auth token in one call
+        result = await consume_cache_entry(key=key, model=AuthToken, expiry_field='expiry')
+    except Exception as err:
+        logging.error(f'Failed to verify auth token due to error: {str(err)}')
+        return None
         
-        # Check if auth token is None
-        if not auth_token_byte:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail='Invalid auth token.'
+    # Check if auth token is None
+    if result == ConsumeResult.missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Invalid auth token.'
         )
-        
-        # Deserialize auth token
-        auth_token_obj = AuthToken.deserialize(auth_token_byte)
-
-        # Check if auth token have expired
-        if datetime.now(timezone.utc) >= auth_token_obj.expiry:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Expired auth token"
+
+    # Check if auth token have expired
+    if result == ConsumeResult.expired:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expired auth token"
         )
-        return True        
-    except Exception as err:
-        logging.error(f'Failed to verify auth token due to error: {str(err)}')
+    return True
+
+
+def invalidate_local_account(key: str) -> None:
+    # Account cache keys are 'account:{id}', index keys 'account_index:{field}:{value}'
+    if key.startswith('account:'):
+        account_local_cache.invalidate(key.removeprefix('account:'))
+    elif key.startswith('account_index:'):
+        account_index_local_cache.invalidate(key.removeprefix('account_index:'))
+
+
+def handle_cache_event(value: bytes) -> None:
+    cache_data = deserialize_event(Cache, value)
+    invalidate_local_account(key=cache_data['key'])
+
+    # Keep the fresh account in-process
+    if cache_data['key'].startswith('account:'):
+        account_data = decode_account(data=cache_data['data'])
+        if account_data is not None:
+            account_local_cache.set(account_data['_id'], account_data)
+
+
+def handle_invalidate_cache_event(value: bytes) -> None:
+    invalidate_local_account(key=deserialize_event(InvalidateCache, value)['key'])
+
+
+def account_token_event_handler(model: type[AvroBaseModel]):
+    # Token events change the account's token list
+    def handle_account_token_event(value: bytes) -> None:
+        account_local_cache.invalidate(deserialize_event(model, value)['id'])
+    return handle_account_token_event
+
+
+def register_account_cache_handlers() -> None:
+    """
+    This is used to drop local account entries when the shared cache or the account tokens change.
+    """
+    register_event_handler(settings.api_cache_topic, handle_cache_event)
+    register_event_handler(settings.api_invalidate_cache_topic, handle_invalidate_cache_event)
+    register_event_handler(settings.api_assign_token, account_token_event_handler(AssignToken))
+    register_event_handler(settings.api_update_token, account_token_event_handler(UpdateToken))
+    register_event_handler(settings.api_revoke_refresh_token_topic, account_token_event_handler(RevokeRefreshToken))
+    register_event_handler(settings.api_reused_refresh_token, account_token_event_handler(ReusedToken))
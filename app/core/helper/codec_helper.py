@@ -0,0 +1,84 @@
+import io
+from functools import lru_cache
+from fastavro import parse_schema, schemaless_writer, schemaless_reader
+from dataclasses_avroschema.pydantic import AvroBaseModel
+from core.model.cache_model import Cache
+
+
+@lru_cache(maxsize=None)
+def get_parsed_schema(model: type[AvroBaseModel]) -> dict:
+    """
+    This is used to parse an AvroBaseModel schema once and reuse it.
+    @params {model} - The model class whose schema is parsed.
+    @returns {dict} - The parsed fastavro schema
+    """
+    return parse_schema(model.avro_schema_to_python())
+
+
+def serialize_event(model: type[AvroBaseModel], data: dict) -> bytes:
+    """
+    This is used to serialize a plain dict with the model's Avro schema.
+    Nested records, such as device info, are passed as nested dicts.
+    @params {model} - The model class describing the event.
+    @params {data} - The event fields.
+    @returns {bytes} - The Avro encoded event, as produced by model.serialize()
+    """
+    buffer = io.BytesIO()
+    schemaless_writer(buffer, get_parsed_schema(model), data)
+    return buffer.getvalue()
+
+
+def deserialize_event(model: type[AvroBaseModel], data: bytes) -> dict:
+    """
+    This is used to deserialize Avro bytes written with the model's schema.
+    @params {model} - The model class describing the event.
+    @params {data} - The Avro encoded event.
+    @returns {dict} - The event fields
+    """
+    return schemaless_reader(io.BytesIO(data), get_parsed_schema(model), None)
+
+
+def serialize_cache_event(key: str, model: type[AvroBaseModel], data: dict) -> bytes:
+    """
+    This is used to serialize a record and wrap it in a Cache event.
+    @params {key} - The cache key.
+    @params {model} - The model class describing the cached record.
+    @params {data} - The cached record fields.
+    @returns {bytes} - The Avro encoded Cache event
+    """
+    return serialize_event(Cache, {'key': key, 'data': serialize_event(model, data)})
+
+
+@lru_cache(maxsize=None)
+def get_field_layout(model: type[AvroBaseModel], field_name: str) -> tuple[str, str] | None:
+    """
+    This is used to describe the encoded fields in front of a timestamp field,
+    so a Redis script can read the timestamp without a full Avro decoder.
+    @params {model} - The model class describing the record.
+    @params {field_name} - The timestamp field to locate.
+    @returns {tuple} - The layout ('s' string/bytes, 'l' int/long, 'b' boolean) and the timestamp logical type, or None when a field cannot be skipped
+    """
+    schema = model.avro_schema_to_python()
+    layout = ''
+
+    for field in schema['fields']:
+        field_type = field['type']
+        logical_type = field_type.get('logicalType') if isinstance(field_type, dict) else None
+        if isinstance(field_type, dict):
+            field_type = field_type.get('type')
+
+        if field['name'] == field_name:
+            if field_type != 'long' or logical_type not in ('timestamp-millis', 'timestamp-micros'):
+                return None
+            return layout, logical_type
+
+        if field_type in ('string', 'bytes'):
+            layout += 's'
+        elif field_type in ('int', 'long'):
+            layout += 'l'
+        elif field_type == 'boolean':
+            layout += 'b'
+        else:
+            return None
+
+    return None
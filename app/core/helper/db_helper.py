@@ -1,6 +1,6 @@
 from core.connection.db_connection import account_col
 
-from core.model.account_model import AccountInDB
+from core.model.account_model import AccountLogin, AccountRefresh
 
 from pydantic import EmailStr
 
@@ -9,26 +9,77 @@ from core.helper.encryption_helper import encrypt
 from core.utils.init_log import logger
 
 
+# Fields read by login, as in AccountLogin
+ACCOUNT_LOGIN_PROJECTION = {
+    '_id': 1,
+    'email': 1,
+    'phone_number': 1,
+    'firstname': 1,
+    'lastname': 1,
+    'hashed_password': 1,
+    'email_verified': 1,
+    'phone_verified': 1,
+    'active_device_count': 1,
+    'role': 1,
+}
+
+# Fields read by refresh, as in AccountRefresh. Token membership is checked by the filter.
+ACCOUNT_REFRESH_PROJECTION = {
+    '_id': 1,
+    'email': 1,
+    'firstname': 1,
+    'lastname': 1,
+    'role': 1,
+}
+
+# Fields kept in the account cache. The token and device lists only grow and are read from their own stores.
+ACCOUNT_CACHE_PROJECTION = {
+    'tokens': 0,
+    'active_devices': 0,
+}
+
+
+def get_email_filter(email: EmailStr) -> dict:
+    return {"email": email}
+
+
+def get_id_filter(id: str) -> dict:
+    return {"_id": id}
+
+
+def get_phone_number_filter(phone_number: str) -> dict:
+    return {"phone_number": phone_number}
+
+
+def get_id_and_refresh_token_filter(id: str, encrypted_token: str) -> dict:
+    return {
+        '$and': [
+            {'_id': id},
+            {'tokens': {'$in': [encrypted_token]}}
+        ]
+    }
+
+
 async def get_account_by_email(email: EmailStr):
     """    
     This is used to retrieve an account from the database using email.
     @params {email} - The email registered to the account to be retrieved.
-    @returns {object} - A dict containing the account data
+    @returns {object} - The account fields used by login
     
     """
     
     # Filter
-    filter = {"email": email}
+    filter = get_email_filter(email=email)
 
     # Query
-    response = await account_col.find_one(filter=filter)
+    response = await account_col.find_one(filter=filter, projection=ACCOUNT_LOGIN_PROJECTION)
 
     # Check if response is None
     if not response:
         return None
     
     # Deserialize
-    account_obj = AccountInDB(**response)
+    account_obj = AccountLogin(**response)
 
     return account_obj
 
@@ -37,21 +88,44 @@ async def get_account_by_id(id: str):
     """
     This is used to retrieve accounts from the database using the id.
     @params {id} - The id registered to the account.
-    @returns {object} - A dict containing the account data
+    @returns {object} - The account fields used by login
     """
 
     # Filter
-    filter = {"_id": id}
+    filter = get_id_filter(id=id)
 
     # Query
-    response = await account_col.find_one(filter=filter)
+    response = await account_col.find_one(filter=filter, projection=ACCOUNT_LOGIN_PROJECTION)
 
     # Check if response is None
     if not response:
         return None
     
     # Deserialize
-    account_obj = AccountInDB(**response)
+    account_obj = AccountLogin(**response)
+
+    return account_obj
+
+
+async def get_refresh_account_by_id(id: str):
+    """
+    This is used to retrieve the account fields used by refresh using the id.
+    @params {id} - The id registered to the account.
+    @returns {object} - The account fields used by refresh
+    """
+
+    # Filter
+    filter = get_id_filter(id=id)
+
+    # Query
+    response = await account_col.find_one(filter=filter, projection=ACCOUNT_REFRESH_PROJECTION)
+
+    # Check if response is None
+    if not response:
+        return None
+
+    # Deserialize
+    account_obj = AccountRefresh(**response)
 
     return account_obj
 
@@ -60,42 +134,64 @@ async def get_account_by_phone_number(phone_number: str):
     """
     This is used to retrieve accounts from the database using the id.
     @params {phone_number} - The phone number registered to the account.
-    @returns {object} - A dict containing the account data
+    @returns {object} - The account fields used by login
     """
     
     # Filter
-    filter = {"phone_number": phone_number}
+    filter = get_phone_number_filter(phone_number=phone_number)
 
     # Query
-    response = await account_col.find_one(filter=filter)
+    response = await account_col.find_one(filter=filter, projection=ACCOUNT_LOGIN_PROJECTION)
 
     # Check if response is None
     if not response:
         return None
     
     # Deserialize
-    account_obj = AccountInDB(**response)
+    account_obj = AccountLogin(**response)
 
     return account_obj
 
 
+async def get_account_document(id: str):
+    """
+    This is used to retrieve the account document, as stored, to fill the account cache.
+    @params {id} - The id registered to the account.
+    @returns {dict} - The account document without its token and device lists
+    """
+
+    # Filter
+    filter = get_id_filter(id=id)
+
+    # Query
+    response = await account_col.find_one(filter=filter, projection=ACCOUNT_CACHE_PROJECTION)
+
+    return response
+
+
 async def get_account_with_id_and_refresh_token(id: str, token: str):
+    """
+    This is used to retrieve an account holding the given refresh token.
+    @params {id} - The id registered to the account.
+    @params {token} - The refresh token issued to the account.
+    @returns {object} - The account fields used by refresh
+    """
     logger.info(f"Fetching account:{id} from database.")
     
     # Encrypt token
     encrypted_token = encrypt(token)
 
     # Filter
-    filter = {
-        '$and': [
-            {'_id': id}, 
-            {'tokens': {'$in': [encrypted_token]}}
-        ]
-    }
+    filter = get_id_and_refresh_token_filter(id=id, encrypted_token=encrypted_token)
 
     # Query
-    response = await account_col.find_one(filter=filter)
+    response = await account_col.find_one(filter=filter, projection=ACCOUNT_REFRESH_PROJECTION)
 
-    return response
+    # Check if response is None
+    if not response:
+        return None
 
+    # Deserialize
+    account_obj = AccountRefresh(**response)
 
+    return account_obj
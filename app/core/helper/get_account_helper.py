@@ -1,24 +1,56 @@
-from core.helper.cache_helper import get_account_from_cache
+from fastapi import BackgroundTasks
+from core.helper.cache_helper import get_account_from_cache, refill_account_cache
+from core.helper.local_cache_helper import account_local_cache
 from core.helper.encryption_helper import encrypt
-from core.helper.db_helper import get_account_with_id_and_refresh_token
-from core.utils.init_log import logger
+from core.helper.db_helper import get_account_with_id_and_refresh_token, get_refresh_account_by_id
+from core.helper.token_session_helper import token_session_exists
+from core.utils.settings import settings
 
 
-async def get_account_with_refresh_token(id: str, refresh_token: str):
+async def get_account_with_refresh_token(id: str, refresh_token: str, background_tasks: BackgroundTasks | None = None) -> tuple[dict | None, bool]:
+    """
+    This is used to find the account a refresh token was issued to.
+    @params {id} - The account id from the token.
+    @params {refresh_token} - The refresh token.
+    @returns {tuple} - The account, or None if the token is not current, and whether the token has a session
+    """
     account_data = {}
 
     # Encrypt refresh token
     encrypted_refresh_token: str = encrypt(value=refresh_token)
 
+    # Check the token session first
+    if await token_session_exists(id=id, encrypted_token=encrypted_refresh_token):
+        account_data = await get_account_from_cache(id=id)
+        if account_data is not None:
+            return account_data, True
+
+        account = await get_refresh_account_by_id(id=id)
+        if account is None:
+            return None, True
+
+        await refill_account_cache(id=id, background_tasks=background_tasks)
+        return account.model_dump(by_alias=True), True
+
+    # Tokens issued before the session store only live in the account document
+    if not settings.api_token_session_fallback:
+        return None, False
+
     # Check if account is in Cache
     account_data: dict = await get_account_from_cache(id=id)
     
     if account_data is not None:
         tokens = account_data.get('tokens')        
         if tokens and (encrypted_refresh_token in tokens):
-            return account_data
-        return None
-    else:
-        account_data = await get_account_with_id_and_refresh_token(id=id, token=refresh_token)
-        return account_data
+            return account_data, False
+
+    # The cached token list can lag behind the database, so confirm there before reporting reuse
+    account = await get_account_with_id_and_refresh_token(id=id, token=refresh_token)
+    if account is None:
+        return None, False
+
+    # The local copy is stale, the slim read cannot replace it
+    account_local_cache.invalidate(id)
+    await refill_account_cache(id=id, background_tasks=background_tasks)
 
+    return account.model_dump(by_alias=True), False
@@ -0,0 +1,337 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from calendar import timegm
+from datetime import datetime
+from functools import lru_cache
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+from jose import jwk, jwt, JWTError
+from core.utils.settings import settings
+
+
+class InvalidTokenError(Exception):
+    """
+    Raised by every backend when a token cannot be decoded, verified or fails claim validation.
+    """
+
+
+# The key type each asymmetric algorithm needs, with the curve for ECDSA
+ASYMMETRIC_KEY_TYPES = {
+    'RS256': ((rsa.RSAPrivateKey, rsa.RSAPublicKey), None),
+    'RS384': ((rsa.RSAPrivateKey, rsa.RSAPublicKey), None),
+    'RS512': ((rsa.RSAPrivateKey, rsa.RSAPublicKey), None),
+    'ES256': ((ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey), 'secp256r1'),
+    'ES384': ((ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey), 'secp384r1'),
+    'ES512': ((ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey), 'secp521r1'),
+    'EdDSA': ((ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey), None),
+}
+
+
+def load_pem_key(algorithm: str, material: str, private: bool):
+    """
+    This is used to load a PEM key and make sure it fits the algorithm, so a wrong key fails when the ring is built.
+    @params {algorithm} - The algorithm the key is configured for.
+    @params {material} - The PEM key.
+    @params {private} - Whether the material is a private key.
+    @returns {object} - The cryptography key object
+    """
+    try:
+        if private:
+            key = serialization.load_pem_private_key(material.encode(), password=None)
+        else:
+            key = serialization.load_pem_public_key(material.encode())
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"Invalid PEM key for algorithm:{algorithm}: {str(err)}")
+
+    key_types, curve = ASYMMETRIC_KEY_TYPES[algorithm]
+    if not isinstance(key, key_types) or (curve is not None and key.curve.name != curve):
+        raise ValueError(f"Key type does not match algorithm:{algorithm}")
+    return key
+
+
+def check_hmac_secret(algorithm: str, material: str) -> None:
+    # A public key used as an HMAC secret would let anyone holding it sign tokens
+    if material.lstrip().startswith('-----BEGIN') or material.lstrip().startswith('ssh-rsa'):
+        raise ValueError(f"An asymmetric key cannot be used as the secret for algorithm:{algorithm}")
+
+
+class JWTBackend(ABC):
+    """
+    Signs and verifies JWTs with key objects it loaded itself.
+    Claim validation follows python-jose: aud, iss and sub must match when present,
+    exp and nbf are enforced when present, iat must be an integer and jti a string.
+    """
+
+    name: str = ''
+    algorithms: tuple[str, ...] = ()
+
+    @abstractmethod
+    def load_signing_key(self, algorithm: str, material: str):
+        ...
+
+    @abstractmethod
+    def load_verification_key(self, algorithm: str, material: str):
+        ...
+
+    @abstractmethod
+    def get_public_jwk(self, algorithm: str, verification_key) -> dict:
+        ...
+
+    @abstractmethod
+    def encode(self, claims: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        ...
+
+    @abstractmethod
+    def get_unverified_header(self, token: str) -> dict:
+        ...
+
+    @abstractmethod
+    def decode(self, token: str, key, algorithm: str, audience: str, issuer: str, subject: str) -> dict:
+        ...
+
+    def check_algorithm(self, algorithm: str) -> None:
+        if algorithm not in self.algorithms:
+            raise ValueError(f"Algorithm:{algorithm} is not supported by the {self.name} JWT backend")
+
+
+class JoseBackend(JWTBackend):
+    """
+    python-jose, the original implementation.
+    """
+
+    name = 'jose'
+    algorithms = ('HS256', 'HS384', 'HS512', 'RS256', 'RS384', 'RS512', 'ES256', 'ES384', 'ES512')
+
+    def load_signing_key(self, algorithm: str, material: str):
+        self.check_algorithm(algorithm)
+        if algorithm.startswith('HS'):
+            check_hmac_secret(algorithm, material)
+        else:
+            load_pem_key(algorithm, material, private=True)
+        return jwk.construct(material, algorithm)
+
+    def load_verification_key(self, algorithm: str, material: str):
+        self.check_algorithm(algorithm)
+        if algorithm.startswith('HS'):
+            check_hmac_secret(algorithm, material)
+        else:
+            load_pem_key(algorithm, material, private=False)
+        return jwk.construct(material, algorithm)
+
+    def get_public_jwk(self, algorithm: str, verification_key) -> dict:
+        return verification_key.to_dict()
+
+    def encode(self, claims: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        return jwt.encode(claims=claims, key=key, algorithm=algorithm, headers=headers)
+
+    def get_unverified_header(self, token: str) -> dict:
+        try:
+            return jwt.get_unverified_header(token)
+        except JWTError as err:
+            raise InvalidTokenError(str(err))
+
+    def decode(self, token: str, key, algorithm: str, audience: str, issuer: str, subject: str) -> dict:
+        try:
+            return jwt.decode(token=token, key=key, algorithms=algorithm, audience=audience, subject=subject, issuer=issuer)
+        except JWTError as err:
+            raise InvalidTokenError(str(err))
+
+
+def base64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def base64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+def base64url_uint(value: int) -> str:
+    return base64url_encode(value.to_bytes((value.bit_length() + 7) // 8 or 1, 'big')).decode()
+
+
+class NativeBackend(JWTBackend):
+    """
+    hmac and hashlib for HMAC, cryptography for RSA, ECDSA and EdDSA, with no per-call key parsing.
+    """
+
+    name = 'native'
+    algorithms = ('HS256', 'HS384', 'HS512', 'RS256', 'RS384', 'RS512', 'ES256', 'ES384', 'ES512', 'EdDSA')
+
+    DIGESTS = {'256': (hashlib.sha256, hashes.SHA256), '384': (hashlib.sha384, hashes.SHA384), '512': (hashlib.sha512, hashes.SHA512)}
+    CURVES = {'ES256': ('P-256', 32), 'ES384': ('P-384', 48), 'ES512': ('P-521', 66)}
+
+    def load_signing_key(self, algorithm: str, material: str):
+        self.check_algorithm(algorithm)
+        if algorithm.startswith('HS'):
+            check_hmac_secret(algorithm, material)
+            return material.encode()
+        return load_pem_key(algorithm, material, private=True)
+
+    def load_verification_key(self, algorithm: str, material: str):
+        self.check_algorithm(algorithm)
+        if algorithm.startswith('HS'):
+            check_hmac_secret(algorithm, material)
+            return material.encode()
+        return load_pem_key(algorithm, material, private=False)
+
+    def get_public_jwk(self, algorithm: str, verification_key) -> dict:
+        if isinstance(verification_key, rsa.RSAPublicKey):
+            numbers = verification_key.public_numbers()
+            return {'kty': 'RSA', 'n': base64url_uint(numbers.n), 'e': base64url_uint(numbers.e)}
+
+        if isinstance(verification_key, ec.EllipticCurvePublicKey):
+            numbers = verification_key.public_numbers()
+            curve, size = self.CURVES[algorithm]
+            return {
+                'kty': 'EC',
+                'crv': curve,
+                'x': base64url_encode(numbers.x.to_bytes(size, 'big')).decode(),
+                'y': base64url_encode(numbers.y.to_bytes(size, 'big')).decode(),
+            }
+
+        if isinstance(verification_key, ed25519.Ed25519PublicKey):
+            raw = verification_key.public_bytes(encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)
+            return {'kty': 'OKP', 'crv': 'Ed25519', 'x': base64url_encode(raw).decode()}
+
+        raise ValueError('Only public keys can be published')
+
+    def sign(self, signing_input: bytes, key, algorithm: str) -> bytes:
+        if algorithm == 'EdDSA':
+            return key.sign(signing_input)
+
+        digest, hash_algorithm = self.DIGESTS[algorithm[2:]]
+        if algorithm.startswith('HS'):
+            return hmac.new(key, signing_input, digest).digest()
+        if algorithm.startswith('RS'):
+            return key.sign(signing_input, padding.PKCS1v15(), hash_algorithm())
+
+        # JWS carries ECDSA signatures as fixed size r || s
+        r, s = decode_dss_signature(key.sign(signing_input, ec.ECDSA(hash_algorithm())))
+        size = self.CURVES[algorithm][1]
+        return r.to_bytes(size, 'big') + s.to_bytes(size, 'big')
+
+    def verify(self, signing_input: bytes, signature: bytes, key, algorithm: str) -> bool:
+        if algorithm.startswith('HS'):
+            return hmac.compare_digest(self.sign(signing_input, key, algorithm), signature)
+
+        try:
+            if algorithm == 'EdDSA':
+                key.verify(signature, signing_input)
+            elif algorithm.startswith('RS'):
+                key.verify(signature, signing_input, padding.PKCS1v15(), self.DIGESTS[algorithm[2:]][1]())
+            else:
+                size = self.CURVES[algorithm][1]
+                if len(signature) != 2 * size:
+                    return False
+                der_signature = encode_dss_signature(int.from_bytes(signature[:size], 'big'), int.from_bytes(signature[size:], 'big'))
+                key.verify(der_signature, signing_input, ec.ECDSA(self.DIGESTS[algorithm[2:]][1]()))
+        except InvalidSignature:
+            return False
+        return True
+
+    def encode(self, claims: dict, key, algorithm: str, headers: dict | None = None) -> str:
+        claims = dict(claims)
+        for time_claim in ('exp', 'iat', 'nbf'):
+            if isinstance(claims.get(time_claim), datetime):
+                claims[time_claim] = timegm(claims[time_claim].utctimetuple())
+
+        header = {'alg': algorithm, 'typ': 'JWT', **(headers or {})}
+        signing_input = b'.'.join([
+            base64url_encode(json.dumps(header, separators=(',', ':'), sort_keys=True).encode()),
+            base64url_encode(json.dumps(claims, separators=(',', ':')).encode()),
+        ])
+        return b'.'.join([signing_input, base64url_encode(self.sign(signing_input, key, algorithm))]).decode()
+
+    def split(self, token: str) -> tuple[bytes, dict, bytes, bytes]:
+        try:
+            signing_input, encoded_signature = token.encode().rsplit(b'.', 1)
+            encoded_header, encoded_payload = signing_input.split(b'.')
+            header = json.loads(base64url_decode(encoded_header))
+            if not isinstance(header, dict):
+                raise ValueError('Invalid header')
+            return signing_input, header, encoded_payload, base64url_decode(encoded_signature)
+        except ValueError as err:
+            raise InvalidTokenError(f"Invalid token: {str(err)}")
+
+    def get_unverified_header(self, token: str) -> dict:
+        return self.split(token)[1]
+
+    def decode(self, token: str, key, algorithm: str, audience: str, issuer: str, subject: str) -> dict:
+        signing_input, header, encoded_payload, signature = self.split(token)
+
+        # Only the key's own algorithm is accepted
+        if header.get('alg') != algorithm:
+            raise InvalidTokenError('The specified alg value is not allowed')
+        if not self.verify(signing_input, signature, key, algorithm):
+            raise InvalidTokenError('Signature verification failed.')
+
+        try:
+            claims = json.loads(base64url_decode(encoded_payload))
+        except ValueError:
+            raise InvalidTokenError('Invalid payload string')
+        if not isinstance(claims, dict):
+            raise InvalidTokenError('Invalid payload string: must be a json object')
+
+        self.validate_claims(claims=claims, audience=audience, issuer=issuer, subject=subject)
+        return claims
+
+    @staticmethod
+    def get_time_claim(claims: dict, name: str, label: str) -> int | None:
+        if name not in claims:
+            return None
+        try:
+            return int(claims[name])
+        except (TypeError, ValueError):
+            raise InvalidTokenError(f"{label} claim ({name}) must be an integer.")
+
+    def validate_claims(self, claims: dict, audience: str, issuer: str, subject: str) -> None:
+        now = timegm(time.gmtime())
+
+        self.get_time_claim(claims, 'iat', 'Issued At')
+
+        not_before = self.get_time_claim(claims, 'nbf', 'Not Before')
+        if not_before is not None and not_before > now:
+            raise InvalidTokenError('The token is not yet valid (nbf)')
+
+        expires_on = self.get_time_claim(claims, 'exp', 'Expiration Time')
+        if expires_on is not None and expires_on < now:
+            raise InvalidTokenError('Signature has expired.')
+
+        if 'aud' in claims:
+            audience_claims = claims['aud'] if isinstance(claims['aud'], list) else [claims['aud']]
+            if not all(isinstance(claim, str) for claim in audience_claims):
+                raise InvalidTokenError('Invalid claim format in token')
+            if audience not in audience_claims:
+                raise InvalidTokenError('Invalid audience')
+
+        if claims.get('iss') != issuer:
+            raise InvalidTokenError('Invalid issuer')
+
+        if 'sub' in claims:
+            if not isinstance(claims['sub'], str):
+                raise InvalidTokenError('Subject must be a string.')
+            if claims['sub'] != subject:
+                raise InvalidTokenError('Invalid subject')
+
+        if 'jti' in claims and not isinstance(claims['jti'], str):
+            raise InvalidTokenError('JWT ID must be a string.')
+
+
+# Backends selectable with api_jwt_backend
+JWT_BACKENDS: dict[str, type[JWTBackend]] = {
+    JoseBackend.name: JoseBackend,
+    NativeBackend.name: NativeBackend,
+}
+
+
+@lru_cache(maxsize=1)
+def get_jwt_backend() -> JWTBackend:
+    if settings.api_jwt_backend not in JWT_BACKENDS:
+        raise ValueError(f"Unknown JWT backend:{settings.api_jwt_backend}")
+    return JWT_BACKENDS[settings.api_jwt_backend]()
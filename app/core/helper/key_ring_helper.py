@@ -0,0 +1,149 @@
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from core.model.key_model import KeyRingEntry
+from core.helper.jwt_backend_helper import get_jwt_backend
+from core.utils.settings import settings
+
+
+# Algorithms signing with a private key and verifying with a public one
+ASYMMETRIC_ALGORITHMS = ('RS256', 'RS384', 'RS512', 'ES256', 'ES384', 'ES512', 'EdDSA')
+HMAC_ALGORITHMS = ('HS256', 'HS384', 'HS512')
+
+
+@dataclass(frozen=True)
+class RingKey:
+    kid: str
+    algorithm: str
+    signing_key: object | None
+    verification_key: object
+    not_before: float
+    not_after: float | None
+
+    def is_asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def get_jwk(self) -> dict:
+        """
+        This is used to publish the public key for local verification downstream.
+        @returns {dict} - The public key as a JWK
+        """
+        public_jwk = get_jwt_backend().get_public_jwk(algorithm=self.algorithm, verification_key=self.verification_key)
+        return {**public_jwk, 'kid': self.kid, 'use': 'sig', 'alg': self.algorithm}
+
+
+class KeyRing:
+    """
+    Keys for one token type, selected by kid. The newest key whose not_before has
+    passed signs, every key until its not_after verifies, so a scheduled rotation
+    keeps tokens signed with the previous key valid through the overlap.
+    """
+
+    def __init__(self, keys: list[RingKey]):
+        self.keys = sorted(keys, key=lambda ring_key: ring_key.not_before)
+        self.keys_by_kid = {ring_key.kid: ring_key for ring_key in self.keys}
+
+    def get_signing_key(self) -> RingKey:
+        now = time.time()
+        for ring_key in reversed(self.keys):
+            if ring_key.signing_key is not None and ring_key.not_before <= now and not self.is_retired(ring_key, now):
+                return ring_key
+        raise ValueError('No active signing key in the key ring')
+
+    def get_verification_key(self, kid: str | None) -> RingKey | None:
+        """
+        This is used to find the key a token was signed with.
+        @params {kid} - The kid from the token header, tokens issued before the ring have none.
+        @returns {object} - The key, or None if it is unknown, malformed or retired
+        """
+        # The header is not verified yet, so the kid can be any JSON value
+        if kid is not None and not isinstance(kid, str):
+            return None
+
+        ring_key = self.keys_by_kid.get(kid or '')
+        if ring_key is None or self.is_retired(ring_key, time.time()):
+            return None
+        return ring_key
+
+    def get_jwks(self) -> dict:
+        now = time.time()
+        return {'keys': [
+            ring_key.get_jwk() for ring_key in self.keys
+            if ring_key.is_asymmetric() and not self.is_retired(ring_key, now)
+        ]}
+
+    @staticmethod
+    def is_retired(ring_key: RingKey, now: float) -> bool:
+        return ring_key.not_after is not None and now >= ring_key.not_after
+
+
+def read_key_file(path: str) -> str:
+    with open(path) as key_file:
+        return key_file.read()
+
+
+def build_ring_key(entry: KeyRingEntry) -> RingKey:
+    """
+    This is used to parse the key material once, so signing and verifying reuse the key objects.
+    @params {entry} - The configured key.
+    @returns {object} - The key with its signing and verification key objects, as loaded by the JWT backend
+    """
+    backend = get_jwt_backend()
+
+    if entry.algorithm in HMAC_ALGORITHMS:
+        signing_key = verification_key = backend.load_signing_key(algorithm=entry.algorithm, material=entry.secret)
+    elif entry.algorithm in ASYMMETRIC_ALGORITHMS:
+        signing_key = backend.load_signing_key(algorithm=entry.algorithm, material=read_key_file(entry.private_key_path)) if entry.private_key_path else None
+        verification_key = backend.load_verification_key(algorithm=entry.algorithm, material=read_key_file(entry.public_key_path))
+    else:
+        raise ValueError(f"Unsupported token algorithm:{entry.algorithm}")
+
+    return RingKey(
+        kid=entry.kid,
+        algorithm=entry.algorithm,
+        signing_key=signing_key,
+        verification_key=verification_key,
+        not_before=entry.not_before.timestamp() if entry.not_before else 0,
+        not_after=entry.not_after.timestamp() if entry.not_after else None,
+    )
+
+
+def build_key_ring(entries: list[dict], default_entry: KeyRingEntry) -> KeyRing:
+    """
+    This is used to build a key ring from settings. Without configured entries the ring
+    holds the single key from the older secret settings, so existing tokens keep verifying.
+    @params {entries} - The configured key ring entries.
+    @params {default_entry} - The key to use when no entries are configured.
+    @returns {object} - The key ring
+    """
+    key_entries = [KeyRingEntry(**entry) for entry in entries] or [default_entry]
+    return KeyRing(keys=[build_ring_key(entry) for entry in key_entries])
+
+
+@lru_cache(maxsize=1)
+def get_access_key_ring() -> KeyRing:
+    if settings.api_access_token_algorithm:
+        default_entry = KeyRingEntry(
+            kid=settings.api_access_token_kid,
+            algorithm=settings.api_access_token_algorithm,
+            private_key_path=settings.api_access_token_private_key_path,
+            public_key_path=settings.api_access_token_public_key_path,
+        )
+    else:
+        default_entry = KeyRingEntry(kid='', algorithm=settings.api_algorithm, secret=settings.api_access_token_secret)
+
+    return build_key_ring(entries=settings.api_access_token_key_ring, default_entry=default_entry)
+
+
+@lru_cache(maxsize=1)
+def get_refresh_key_ring() -> KeyRing:
+    default_entry = KeyRingEntry(kid='', algorithm=settings.api_algorithm, secret=settings.api_refresh_token_secret)
+    return build_key_ring(entries=settings.api_refresh_token_key_ring, default_entry=default_entry)
+
+
+def get_jwks() -> dict:
+    """
+    This is used to build the JSON Web Key Set of the access token verification keys.
+    @returns {dict} - The key set, empty when access tokens use a shared secret
+    """
+    return get_access_key_ring().get_jwks()
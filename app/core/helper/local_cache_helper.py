@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from core.event.consume_event import get_event_consumer_epoch
+from core.utils.settings import settings
+
+
+class LocalCache:
+    """
+    A bounded, in-process LRU cache whose entries expire after a TTL.
+    A cache that follows events is only used while the event consumer runs,
+    and starts empty after every consumer restart, since it may have missed invalidations.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, follows_events: bool = False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.follows_events = follows_events
+        self.epoch: int | None = None
+        self.entries: OrderedDict = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0, 'bypassed': 0}
+
+    def is_usable(self) -> bool:
+        if not self.follows_events:
+            return True
+
+        # Drop what was cached before the consumer went down
+        epoch = get_event_consumer_epoch()
+        if epoch != self.epoch:
+            self.entries.clear()
+            self.epoch = epoch
+        return epoch is not None
+
+    def get(self, key):
+        if not self.is_usable():
+            self.stats['bypassed'] += 1
+            return None
+
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        value, expires_on = entry
+        if time.monotonic() >= expires_on:
+            del self.entries[key]
+            self.stats['expirations'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        if not self.is_usable():
+            return
+
+        self.entries[key] = (value, time.monotonic() + (ttl if ttl is not None else self.ttl))
+        self.entries.move_to_end(key)
+
+        # Evict the least recently used entries
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def invalidate(self, key) -> None:
+        if self.entries.pop(key, None) is not None:
+            self.stats['invalidations'] += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def get_stats(self) -> dict:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else 0,
+            **self.stats,
+        }
+
+
+# Account documents keyed by account id
+account_local_cache = LocalCache(maxsize=settings.api_account_local_cache_size, ttl=settings.api_account_local_cache_ttl, follows_events=True)
+
+# Account ids keyed by '{field}:{value}' login identifier
+account_index_local_cache = LocalCache(maxsize=settings.api_account_local_cache_size, ttl=settings.api_account_local_cache_ttl, follows_events=True)
+
+# Verified access token claims and the ring key that verified them, keyed by token fingerprint, each kept until the token expires
+verified_token_local_cache = LocalCache(maxsize=settings.api_verified_token_cache_size, ttl=settings.api_access_token_expiry)
@@ -0,0 +1,83 @@
+from core.connection.cache_connection import redis
+from core.helper.local_cache_helper import LocalCache
+from core.helper.codec_helper import deserialize_event
+from core.event.consume_event import register_event_handler
+from core.model.account_model import AccountInDB
+from core.utils.settings import settings
+from core.utils.init_log import logger
+
+
+# Login identifiers with no account, in-process and shared through Redis
+missing_account_local_cache = LocalCache(maxsize=settings.api_missing_account_cache_size, ttl=settings.api_missing_account_ttl, follows_events=True)
+
+# Negative cache counters
+negative_cache_stats = {
+    'local_hits': 0,
+    'redis_hits': 0,
+    'misses': 0,
+    'stored': 0,
+    'invalidated': 0,
+}
+
+
+def get_negative_cache_stats() -> dict:
+    """
+    This is used to report how many lookups for unknown identifiers skipped the database.
+    @returns {dict} - The negative cache counters
+    """
+    return {
+        'size': len(missing_account_local_cache.entries),
+        **negative_cache_stats,
+    }
+
+
+async def is_missing_account(identifier: str) -> bool:
+    """
+    This is used to check if an identifier recently returned no account.
+    @params {identifier} - The email or phone number used to log in.
+    @returns {bool} - True if the identifier is known not to have an account
+    """
+    if missing_account_local_cache.get(identifier):
+        negative_cache_stats['local_hits'] += 1
+        return True
+
+    try:
+        if await redis.exists(f"missing_account:{identifier}".encode()):
+            negative_cache_stats['redis_hits'] += 1
+            missing_account_local_cache.set(identifier, True)
+            return True
+    except Exception as err:
+        logger.error(f"Failed to check missing account cache due to error: {str(err)}")
+
+    negative_cache_stats['misses'] += 1
+    return False
+
+
+async def remember_missing_account(identifier: str) -> None:
+    missing_account_local_cache.set(identifier, True)
+    negative_cache_stats['stored'] += 1
+
+    try:
+        await redis.set(f"missing_account:{identifier}".encode(), b'1', ex=settings.api_missing_account_ttl)
+    except Exception as err:
+        logger.error(f"Failed to cache missing account due to error: {str(err)}")
+
+
+async def forget_missing_account(*identifiers: str) -> None:
+    for identifier in identifiers:
+        missing_account_local_cache.invalidate(identifier)
+    negative_cache_stats['invalidated'] += len(identifiers)
+
+    try:
+        await redis.delete(*[f"missing_account:{identifier}".encode() for identifier in identifiers])
+    except Exception as err:
+        logger.error(f"Failed to invalidate missing account cache due to error: {str(err)}")
+
+
+async def handle_account_created_event(value: bytes) -> None:
+    account_data = deserialize_event(AccountInDB, value)
+    await forget_missing_account(account_data['email'], account_data['phone_number'])
+
+
+def register_negative_cache_handlers() -> None:
+    register_event_handler(settings.api_account_created_topic, handle_account_created_event)
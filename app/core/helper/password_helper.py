@@ -1,5 +1,84 @@
-from passlib.hash import bcrypt as pwd_context
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from passlib.context import CryptContext
+from core.utils.settings import settings
 from core.utils.init_log import logger
+from core.utils.error import overloaded_error
+
+
+def build_password_context(scheme: str | None = None, rounds: int | None = None) -> CryptContext:
+    """
+    This is used to build the password policy. New hashes use the configured scheme and cost,
+    hashes of another scheme or cost, higher or lower, still verify and are reported as needing an update.
+    @params {scheme} - The scheme for new hashes, defaults to the configured one.
+    @params {rounds} - The cost for new hashes, defaults to the configured one.
+    @returns {object} - The passlib context
+    """
+    scheme = scheme or settings.api_password_hash_scheme
+    rounds = rounds or (settings.api_password_scrypt_rounds if scheme == 'scrypt' else settings.api_password_bcrypt_rounds)
+    schemes = [scheme] if scheme == 'bcrypt' else [scheme, 'bcrypt']
+
+    return CryptContext(
+        schemes=schemes,
+        default=scheme,
+        deprecated='auto',
+        # Pin the cost both ways, so lowering it migrates hashes down as well
+        **{f"{scheme}__default_rounds": rounds, f"{scheme}__min_rounds": rounds, f"{scheme}__max_rounds": rounds}
+    )
+
+
+# Current password policy
+pwd_context = build_password_context()
+
+# Bounded pool for password hashing, off the event loop
+password_executor: Executor | None = None
+password_slots = asyncio.Semaphore(settings.api_password_hash_workers)
+
+# Password hashing counters
+password_hash_stats = {
+    'queue_depth': 0,
+    'in_flight': 0,
+    'completed': 0,
+    'rejected': 0,
+    'timed_out': 0,
+    'total_hash_seconds': 0.0,
+    'max_hash_seconds': 0.0,
+}
+
+
+def get_password_hash_stats() -> dict:
+    """
+    This is used to report the password pool queue depth and hash time.
+    @returns {dict} - The password hashing counters
+    """
+    completed = password_hash_stats['completed']
+    return {
+        'workers': settings.api_password_hash_workers,
+        'queue_size': settings.api_password_hash_queue_size,
+        'avg_hash_seconds': round(password_hash_stats['total_hash_seconds'] / completed, 4) if completed else 0,
+        **password_hash_stats,
+    }
+
+
+def get_password_executor() -> Executor:
+    global password_executor
+
+    if password_executor is None:
+        if settings.api_password_hash_executor == 'process':
+            password_executor = ProcessPoolExecutor(max_workers=settings.api_password_hash_workers)
+        else:
+            password_executor = ThreadPoolExecutor(max_workers=settings.api_password_hash_workers, thread_name_prefix='password-hash')
+
+    return password_executor
+
+
+def shutdown_password_executor() -> None:
+    global password_executor
+
+    if password_executor is not None:
+        password_executor.shutdown(wait=False, cancel_futures=True)
+        password_executor = None
 
 
 def verify_password(plain_password, hashed_password):
@@ -7,4 +86,91 @@ def verify_password(plain_password, hashed_password):
         return  pwd_context.verify(secret=plain_password, hash=hashed_password)
    except Exception as err:
        logger.error(f"Failed to verify password due to error: {str(err)}")
-     
\ No newline at end of file
+
+
+async def run_in_password_pool(func, *args):
+    """
+    This is used to run a password hashing function in the bounded pool.
+    Requests beyond the queue size, or waiting longer than the queue timeout, get a 503.
+    @params {func} - The hashing function to run.
+    @returns {object} - The function result
+    """
+    # Shed load once the queue is full
+    if password_hash_stats['queue_depth'] >= settings.api_password_hash_queue_size:
+        password_hash_stats['rejected'] += 1
+        raise overloaded_error
+
+    # Wait for a free worker
+    password_hash_stats['queue_depth'] += 1
+    try:
+        await asyncio.wait_for(password_slots.acquire(), timeout=settings.api_password_hash_queue_timeout)
+    except asyncio.TimeoutError:
+        password_hash_stats['timed_out'] += 1
+        raise overloaded_error
+    finally:
+        password_hash_stats['queue_depth'] -= 1
+
+    password_hash_stats['in_flight'] += 1
+    started_on = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_password_executor(), func, *args)
+    finally:
+        hash_seconds = time.perf_counter() - started_on
+        password_hash_stats['in_flight'] -= 1
+        password_hash_stats['completed'] += 1
+        password_hash_stats['total_hash_seconds'] += hash_seconds
+        password_hash_stats['max_hash_seconds'] = max(password_hash_stats['max_hash_seconds'], hash_seconds)
+        password_slots.release()
+
+
+def hash_password(plain_password) -> str:
+    return pwd_context.hash(secret=plain_password)
+
+
+def verify_and_update_password(plain_password, hashed_password) -> tuple[bool, str | None]:
+    """
+    This is used to verify a password and rehash it if it does not match the current policy.
+    @returns {tuple} - Whether the password is valid and the new hash, if one is needed
+    """
+    try:
+        return pwd_context.verify_and_update(secret=plain_password, hash=hashed_password)
+    except Exception as err:
+        logger.error(f"Failed to verify password due to error: {str(err)}")
+        return False, None
+
+
+def measure_hash_seconds(scheme: str, rounds: int, samples: int = 3) -> float:
+    context = build_password_context(scheme=scheme, rounds=rounds)
+    hashed_password = context.hash('calibration-password')
+
+    started_on = time.perf_counter()
+    for _ in range(samples):
+        context.verify('calibration-password', hashed_password)
+    return (time.perf_counter() - started_on) / samples
+
+
+def calibrate_rounds(scheme: str, target_seconds: float, min_rounds: int = 4, max_rounds: int = 20) -> tuple[int, float]:
+    """
+    This is used to find the highest cost whose verify time stays within the target on this host.
+    @params {scheme} - The scheme to calibrate, bcrypt or scrypt.
+    @params {target_seconds} - The verify time to aim for.
+    @returns {tuple} - The chosen rounds and their measured verify time
+    """
+    chosen_rounds, chosen_seconds = min_rounds, measure_hash_seconds(scheme=scheme, rounds=min_rounds)
+
+    # Each extra round doubles the cost
+    for rounds in range(min_rounds + 1, max_rounds + 1):
+        seconds = measure_hash_seconds(scheme=scheme, rounds=rounds)
+        if seconds > target_seconds:
+            break
+        chosen_rounds, chosen_seconds = rounds, seconds
+
+    return chosen_rounds, chosen_seconds
+
+
+async def verify_password_in_pool(plain_password, hashed_password):
+    return await run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password_in_pool(plain_password, hashed_password) -> tuple[bool, str | None]:
+    return await run_in_password_pool(verify_and_update_password, plain_password, hashed_password)
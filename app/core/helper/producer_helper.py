@@ -1,5 +1,7 @@
 from aiokafka.admin import AIOKafkaAdminClient, NewTopic
+from aiokafka.errors import TopicAlreadyExistsError
 from core.utils.settings import settings
+import asyncio
 import logging
 
 
@@ -9,41 +11,130 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger("Account Write API")
 
 
-async def topic_exists(topic: str):
-    try:
-        admin_client = AIOKafkaAdminClient(bootstrap_servers=settings.api_event_streaming_host, client_id=settings.api_event_streaming_client_id)
+# In-memory registry of topics known to exist on the cluster
+known_topics: set[str] = set()
+
+# Long-lived admin client and background refresh task
+admin_client: AIOKafkaAdminClient | None = None
+refresh_topics_task: asyncio.Task | None = None
+
+
+def get_managed_topics() -> list[str]:
+    """
+    This is used to list every topic this service produces to.
+    @returns {list} - The topic names configured in settings
+    """
+    return [
+        settings.api_cache_topic,
+        settings.api_revoke_refresh_token_topic,
+        settings.api_logout_topic,
+        settings.api_assign_token,
+        settings.api_add_new_device,
+        settings.api_invalidate_account_token,
+        settings.api_update_token,
+        settings.api_reused_refresh_token,
+        settings.api_invalidate_cache_topic,
+        settings.api_update_password_hash_topic,
+    ]
+
+
+async def get_admin_client() -> AIOKafkaAdminClient:
+    global admin_client
+
+    if admin_client is None:
+        new_admin_client = AIOKafkaAdminClient(bootstrap_servers=settings.api_event_streaming_host, client_id=settings.api_event_streaming_client_id)
         logger.info('Starting Kafka AdminClient.')
-        await admin_client.start()
-        
-        # Check if topic exists
-        existing_topics = await admin_client.list_topics()
-        if topic in existing_topics:
-            return True
-        return False    
-       
+        await new_admin_client.start()
+        admin_client = new_admin_client
+
+    return admin_client
+
+
+async def refresh_topics() -> set[str]:
+    """
+    This is used to reload the topic registry from the cluster metadata.
+    @returns {set} - The topics known to exist
+    """
+    client = await get_admin_client()
+
+    # List cluster topics
+    existing_topics = await client.list_topics()
+    known_topics.clear()
+    known_topics.update(existing_topics)
+
+    return known_topics
+
+
+async def provision_topics() -> None:
+    """
+    This is used to create every managed topic missing from the cluster.
+    """
+    try:
+        await refresh_topics()
+
+        # Create missing topics
+        for topic in get_managed_topics():
+            if topic not in known_topics:
+                logger.info(f"Topic: {topic} not found.")
+                await create_topic(topic=topic)
     except Exception as err:
-        logger.error(f"Failed to start Kafka AdminClient due to error: {str(err)}", exc_info=1)
-    finally:
+        logger.error(f"Failed to provision topics due to error: {str(err)}", exc_info=1)
+
+
+async def refresh_topics_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.api_topic_refresh_interval)
+        try:
+            await refresh_topics()
+        except Exception as err:
+            logger.error(f"Failed to refresh topics due to error: {str(err)}", exc_info=1)
+
+
+async def start_topic_registry() -> None:
+    global refresh_topics_task
+
+    # Provision managed topics once
+    logger.info('Provisioning event topics.')
+    await provision_topics()
+
+    # Keep the registry fresh in the background
+    if refresh_topics_task is None:
+        refresh_topics_task = asyncio.create_task(refresh_topics_periodically())
+
+
+async def stop_topic_registry() -> None:
+    global admin_client, refresh_topics_task
+
+    if refresh_topics_task is not None:
+        refresh_topics_task.cancel()
+        refresh_topics_task = None
+
+    if admin_client is not None:
         logger.info('Closing Kafka AdminClient')
         await admin_client.close()
+        admin_client = None
 
 
-async def create_topic(topic: str, partitions: int = 10, replication_factor: int = 3):
-    try:
-        admin_client = AIOKafkaAdminClient(bootstrap_servers=settings.api_event_streaming_host, client_id=settings.api_event_streaming_client_id)
+async def topic_exists(topic: str) -> bool:
+    return topic in known_topics
+
 
-        # Start the admin client  
-        logger.info('Starting Kafka AdminClient.')  
-        await admin_client.start()
+async def create_topic(topic: str, partitions: int | None = None, replication_factor: int | None = None):
+    partitions = partitions or settings.api_topic_partitions
+    replication_factor = replication_factor or settings.api_topic_replication_factor
+
+    try:
+        client = await get_admin_client()
 
         # Create a new topic
         topic_list = []
         topic_list.append(NewTopic(name=topic, num_partitions=partitions, replication_factor=replication_factor))
         logger.info(f'Creating new topic:{topic} with {partitions} partition and {replication_factor} replication factor.')
-        await admin_client.create_topics(new_topics=topic_list, validate_only=False)
+        await client.create_topics(new_topics=topic_list, validate_only=False)
+        known_topics.add(topic)
+        return topic
+    except TopicAlreadyExistsError:
+        known_topics.add(topic)
         return topic
     except Exception as err:
-        logger.error(f"Failed to start Kafka AdminClient due to error: {str(err)}", exc_info=1)
-    finally:
-        logger.info('Closing Kafka AdminClient')
-        await admin_client.close()
\ No newline at end of file
+        logger.error(f"Failed to create topic:{topic} due to error: {str(err)}", exc_info=1)
@@ -0,0 +1,104 @@
+import time
+import secrets
+from core.connection.cache_connection import redis
+from core.helper.local_cache_helper import LocalCache
+from core.utils.settings import settings
+from core.utils.init_log import logger
+from core.utils.error import too_many_requests_error
+
+
+# Token buckets per client IP, as (tokens, updated_on)
+ip_buckets = LocalCache(
+    maxsize=settings.api_login_ip_bucket_count,
+    ttl=settings.api_login_ip_burst / settings.api_login_ip_rate
+)
+
+# Rate limit counters
+rate_limit_stats = {
+    'allowed': 0,
+    'rejected_ip': 0,
+    'rejected_account': 0,
+    'redis_errors': 0,
+}
+
+
+def get_rate_limit_stats() -> dict:
+    """
+    This is used to report how many login attempts were allowed and shed.
+    @returns {dict} - The rate limit counters
+    """
+    return {
+        'tracked_ips': len(ip_buckets.entries),
+        **rate_limit_stats,
+    }
+
+
+def take_ip_token(ip: str) -> bool:
+    """
+    This is used to spend one token from the client IP's bucket.
+    @params {ip} - The client IP address.
+    @returns {bool} - False if the bucket is empty
+    """
+    now = time.monotonic()
+    bucket = ip_buckets.get(ip)
+    tokens, updated_on = bucket if bucket else (settings.api_login_ip_burst, now)
+
+    # Refill since the last attempt
+    tokens = min(settings.api_login_ip_burst, tokens + (now - updated_on) * settings.api_login_ip_rate)
+    if tokens < 1:
+        ip_buckets.set(ip, (tokens, now))
+        return False
+
+    ip_buckets.set(ip, (tokens - 1, now))
+    return True
+
+
+async def count_account_attempts(identifier: str) -> int:
+    """
+    This is used to record a login attempt in the identifier's shared sliding window.
+    @params {identifier} - The email or phone number used to log in.
+    @returns {int} - The attempts in the current window, including this one
+    """
+    key = f"login_attempts:{identifier}"
+    now_ms = int(time.time() * 1000)
+    window_ms = settings.api_login_account_window * 1000
+
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zremrangebyscore(key, 0, now_ms - window_ms)
+        pipe.zadd(key, {f"{now_ms}-{secrets.token_hex(4)}": now_ms})
+        pipe.zcard(key)
+        pipe.pexpire(key, window_ms)
+        _, _, attempts, _ = await pipe.execute()
+
+    return attempts
+
+
+async def check_login_rate_limit(ip: str, identifier: str) -> None:
+    """
+    This is used to reject login attempts over the limits before any database or hash work.
+    @params {ip} - The client IP address.
+    @params {identifier} - The email or phone number used to log in.
+    """
+    if not settings.api_login_rate_limit_enabled:
+        return
+
+    # Cheap in-process check first
+    if not take_ip_token(ip=ip):
+        rate_limit_stats['rejected_ip'] += 1
+        logger.warning(f"Login rate limit exceeded for ip:{ip}.")
+        raise too_many_requests_error
+
+    # Shared limit per account across instances
+    try:
+        attempts = await count_account_attempts(identifier=identifier)
+    except Exception as err:
+        rate_limit_stats['redis_errors'] += 1
+        logger.error(f"Failed to check login rate limit due to error: {str(err)}")
+        attempts = 0
+
+    if attempts > settings.api_login_account_limit:
+        rate_limit_stats['rejected_account'] += 1
+        logger.warning('Login rate limit exceeded for account.')
+        raise too_many_requests_error
+
+    rate_limit_stats['allowed'] += 1
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from core.connection.cache_connection import redis
+from core.helper.bloom_filter_helper import BloomFilter
+from core.helper.codec_helper import deserialize_event
+from core.event.consume_event import register_event_handler, register_consumer_start_handler, get_event_consumer_epoch
+from core.model.token_model import RevokeRefreshToken
+from core.utils.settings import settings
+from core.utils.init_log import logger
+
+
+# Bloom filter of revoked refresh token fingerprints ('{account_id}-{sha3}')
+revoked_token_filter: BloomFilter | None = None
+
+# The consumer epoch the filter was built in, it misses revocations from before a restart
+revoked_token_filter_epoch: int | None = None
+
+# Fingerprints revoked while a rebuild is scanning Redis
+rebuild_fingerprints: list[str] | None = None
+rebuild_task: asyncio.Task | None = None
+rebuild_requested = asyncio.Event()
+
+# Filter counters
+revoked_token_filter_stats = {
+    'checks': 0,
+    'bypassed': 0,
+    'negatives': 0,
+    'positives': 0,
+    'false_positives': 0,
+    'rebuilds': 0,
+    'last_rebuild_seconds': 0,
+}
+
+
+def get_revoked_token_filter_stats() -> dict:
+    """
+    This is used to report the filter size, false-positive rate and rebuild time.
+    @returns {dict} - The filter counters
+    """
+    return {
+        'ready': is_revoked_token_filter_ready(),
+        **(revoked_token_filter.get_stats() if revoked_token_filter else {}),
+        **revoked_token_filter_stats,
+    }
+
+
+def is_revoked_token_filter_ready() -> bool:
+    """
+    This is used to check the filter can be trusted. Without the revoke stream,
+    tokens revoked on other instances never reach the filter.
+    @returns {bool} - True if the filter is built and kept up to date
+    """
+    return revoked_token_filter is not None and revoked_token_filter_epoch is not None and revoked_token_filter_epoch == get_event_consumer_epoch()
+
+
+def might_be_revoked(fingerprint: str) -> bool:
+    """
+    This is used to skip the Redis lookup for tokens that were never revoked.
+    @params {fingerprint} - The '{account_id}-{sha3}' token fingerprint.
+    @returns {bool} - False only if the token is certainly not revoked
+    """
+    # No filter yet, or it is missing revocations, Redis has to answer
+    if not is_revoked_token_filter_ready():
+        revoked_token_filter_stats['bypassed'] += 1
+        return True
+
+    revoked_token_filter_stats['checks'] += 1
+    if fingerprint in revoked_token_filter:
+        revoked_token_filter_stats['positives'] += 1
+        return True
+
+    revoked_token_filter_stats['negatives'] += 1
+    return False
+
+
+def record_false_positive() -> None:
+    revoked_token_filter_stats['false_positives'] += 1
+
+
+def add_revoked_token(fingerprint: str) -> None:
+    if revoked_token_filter is not None:
+        revoked_token_filter.add(fingerprint)
+
+    # Keep it for the filter being rebuilt
+    if rebuild_fingerprints is not None:
+        rebuild_fingerprints.append(fingerprint)
+
+
+def handle_revoke_refresh_token_event(value: bytes) -> None:
+    revoked_token = deserialize_event(RevokeRefreshToken, value)
+    add_revoked_token(fingerprint=f"{revoked_token['id']}-{revoked_token['token']}")
+
+
+async def build_revoked_token_filter() -> None:
+    """
+    This is used to build a new filter from the revoked tokens in Redis and swap it in.
+    """
+    global revoked_token_filter, revoked_token_filter_epoch, rebuild_fingerprints
+
+    started_on = time.monotonic()
+    epoch = get_event_consumer_epoch()
+    rebuild_fingerprints = []
+
+    try:
+        new_filter = BloomFilter(
+            capacity=settings.api_revoked_token_filter_capacity,
+            error_rate=settings.api_revoked_token_filter_error_rate
+        )
+
+        # Snapshot revoked tokens from the cache
+        async for key in redis.scan_iter(match='refresh_token:*', count=settings.api_revoked_token_filter_scan_count):
+            new_filter.add(key.decode().removeprefix('refresh_token:'))
+
+        # Add tokens revoked during the scan
+        for fingerprint in rebuild_fingerprints:
+            new_filter.add(fingerprint)
+
+        revoked_token_filter = new_filter
+        revoked_token_filter_epoch = epoch
+    finally:
+        rebuild_fingerprints = None
+
+    revoked_token_filter_stats['rebuilds'] += 1
+    revoked_token_filter_stats['last_rebuild_seconds'] = round(time.monotonic() - started_on, 3)
+    logger.info(f"Built revoked token filter with {revoked_token_filter.count} tokens in {revoked_token_filter_stats['last_rebuild_seconds']}s.")
+
+
+def request_revoked_token_filter_rebuild() -> None:
+    rebuild_requested.set()
+
+
+async def rebuild_revoked_token_filter_periodically() -> None:
+    while True:
+        rebuild_requested.clear()
+        try:
+            await build_revoked_token_filter()
+        except Exception as err:
+            logger.error(f"Failed to build revoked token filter due to error: {str(err)}", exc_info=1)
+
+        # Rebuilding drops expired tokens and keeps the false-positive rate down,
+        # a consumer restart asks for one early since revocations were missed
+        try:
+            await asyncio.wait_for(rebuild_requested.wait(), timeout=settings.api_revoked_token_filter_rebuild_interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def register_revoked_token_handlers() -> None:
+    register_event_handler(settings.api_revoke_refresh_token_topic, handle_revoke_refresh_token_event)
+    register_consumer_start_handler(request_revoked_token_filter_rebuild)
+
+
+async def start_revoked_token_filter() -> None:
+    global rebuild_task
+
+    if rebuild_task is None:
+        rebuild_task = asyncio.create_task(rebuild_revoked_token_filter_periodically())
+
+
+async def stop_revoked_token_filter() -> None:
+    global rebuild_task
+
+    if rebuild_task is not None:
+        rebuild_task.cancel()
+        rebuild_task = None
@@ -1,7 +1,8 @@
-from datetime import datetime, timedelta
+import hashlib
+import hmac
+import time
 from core.utils.settings import settings
-from jose import jwt, JWTError
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, BackgroundTasks
 import secrets
 from core.helper.cache_helper import *
 from pydantic import EmailStr
@@ -10,28 +11,49 @@ from core.helper.get_account_helper import get_account_with_refresh_token
 from core.helper.encryption_helper import encrypt
 from core.utils.error import credential_error
 from core.model.cache_model import InvalidateCache
+from core.helper.codec_helper import serialize_event
+from core.helper.local_cache_helper import account_local_cache, verified_token_local_cache
+from core.helper.revoked_token_filter_helper import add_revoked_token
+from core.helper.token_session_helper import create_token_session, rotate_token_session, delete_token_session, delete_account_token_sessions
+from core.helper.key_ring_helper import KeyRing, RingKey, get_access_key_ring, get_refresh_key_ring
+from core.helper.jwt_backend_helper import InvalidTokenError, get_jwt_backend
 
 
-def create_token(payload: dict, secret: str):
-    # Encode token
+def sign_token(payload: dict, ring_key: RingKey) -> str:
+    headers = {'kid': ring_key.kid} if ring_key.kid else None
+
+    # Encode token, a missing token must never be handed out
     try:
-        return jwt.encode(claims=payload, key=secret, algorithm=settings.api_algorithm)
+        return get_jwt_backend().encode(claims=payload, key=ring_key.signing_key, algorithm=ring_key.algorithm, headers=headers)
     except Exception as err:
         logger.error(f'Failed to create token due to error: {str(err)}')
+        raise
+
+
+def create_token(payload: dict, key_ring: KeyRing):
+    # Sign with the ring's current key
+    return sign_token(payload=payload, ring_key=key_ring.get_signing_key())
 
 
-def verify_token(token: str, secret: str) -> dict:
+def verify_token(token: str, key_ring: KeyRing) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'}
     )
 
+    backend = get_jwt_backend()
+
     try:
-        payload = jwt.decode(
+        # Pick the key the token was signed with
+        ring_key = key_ring.get_verification_key(kid=backend.get_unverified_header(token).get('kid'))
+        if ring_key is None:
+            raise credentials_exception
+
+        payload = backend.decode(
             token=token, 
-            key=secret, 
-            algorithms=settings.api_algorithm, 
+            key=ring_key.verification_key, 
+            algorithm=ring_key.algorithm, 
             audience=settings.api_token_aud,
             subject=settings.api_token_sub,
             issuer=settings.api_token_iss
@@ -39,11 +61,43 @@ def verify_token(token: str, secret: str) -> dict:
         if not payload:
             raise credentials_exception 
         return payload
-    except JWTError as err:
+    except InvalidTokenError as err:
         logger.error(f'Failed to verify token due to error: {str(err)}')
         raise credentials_exception
     
 
+def verify_access_token(token: str) -> dict:
+    """
+    This is used to verify an access token, reusing the claims of a token verified before.
+    A hit needs the exact same token, so a tampered token is always fully verified, and
+    the key it was verified with must still be in the ring, so retiring a key drops its tokens.
+    @params {token} - The access token.
+    @returns {dict} - The token claims
+    """
+    fingerprint = hashlib.sha256(token.encode()).digest()
+    key_ring = get_access_key_ring()
+
+    # Check previously verified tokens
+    entry = verified_token_local_cache.get(fingerprint)
+    if entry is not None:
+        verified_token, payload, ring_key = entry
+        if (hmac.compare_digest(verified_token, token)
+                and payload['exp'] > time.time()
+                and key_ring.get_verification_key(kid=ring_key.kid) is ring_key):
+            return payload
+        verified_token_local_cache.invalidate(fingerprint)
+
+    payload = verify_token(token=token, key_ring=key_ring)
+
+    # Keep the claims until the token expires
+    ttl = payload['exp'] - time.time()
+    ring_key = key_ring.get_verification_key(kid=get_jwt_backend().get_unverified_header(token).get('kid'))
+    if ttl > 0 and ring_key is not None:
+        verified_token_local_cache.set(fingerprint, (token, payload, ring_key), ttl=ttl)
+
+    return payload
+
+
 def create_auth_token(bytes: int) -> str:
     return secrets.token_hex(bytes)
 
@@ -51,41 +105,47 @@ def create_auth_token(bytes: int) -> str:
 async def get_token_data(refresh_token: str):
     # Verify refresh token
     logger.info(f"Validating refresh token.")
-    valid_refresh_token_data = verify_token(token=refresh_token, secret=settings.api_refresh_token_secret)
+    valid_refresh_token_data = verify_token(token=refresh_token, key_ring=get_refresh_key_ring())
     if valid_refresh_token_data is None:
         logger.error('Invalid refresh token.')
         raise credential_error
     
     # Check if refresh token was revoked
     logger.info(f"Checking if refresh token have been previously revoked.")
-    is_revoked = is_revoked_token(refresh_token=refresh_token, account_id=valid_refresh_token_data.get('_id'))
+    is_revoked = await is_revoked_token(token=refresh_token, account_id=valid_refresh_token_data.get('id'))
     if is_revoked:
         raise credential_error
     
     return True, valid_refresh_token_data
 
 
-async def revoke_refresh_token(token: str, id: str, device_ip: str):
+async def revoke_refresh_token(token: str, id: str, device_ip: str, background_tasks: BackgroundTasks | None = None):
     # Encrypt token
     encrypted_token = encrypt(value=token)
 
-    # Create revoke token obj
-    revoke_token_obj = RevokeRefreshToken(id=id, token=encrypted_token, device_ip=device_ip)
+    # Drop the stale local account
+    account_local_cache.invalidate(id)
+
+    # Add to the revoked token filter without waiting for the stream
+    add_revoked_token(fingerprint=f"{id}-{encrypted_token}")
+
+    # End the session
+    await delete_token_session(id=id, encrypted_token=encrypted_token)
 
-    # Serialize token
-    revoke_token_event = revoke_token_obj.serialize()
+    # Serialize revoke token event
+    revoke_token_event = serialize_event(RevokeRefreshToken, {'id': id, 'token': encrypted_token, 'device_ip': device_ip})
     
     # Emit event
-    await produce_event(topic=settings.api_revoke_refresh_token_topic, value=revoke_token_event)
+    await produce_event(topic=settings.api_revoke_refresh_token_topic, value=revoke_token_event, key=id, background_tasks=background_tasks)
 
 
-def generate_token_set(id: str, is_admin: bool, firstname: str, lastname: str, email: EmailStr):
-    # Create token expiry
-    access_token_exp = datetime.utcnow() + timedelta(seconds=settings.api_access_token_expiry)
-    refresh_token_exp = datetime.utcnow() + timedelta(seconds=settings.api_refresh_token_expiry)
-    
-    # Create payload
-    payload_access_token = {
+def get_token_claims(id: str, is_admin: bool, firstname: str, lastname: str, email: EmailStr, issued_on: int) -> tuple[dict, dict]:
+    """
+    This is used to build the access and refresh token claims from one template and one timestamp.
+    @params {issued_on} - The issue time in seconds since the epoch, shared by both tokens.
+    @returns {tuple} - The access token claims and the refresh token claims
+    """
+    claims = {
         'iss': settings.api_token_iss,
         'aud': settings.api_token_aud,
         'sub': settings.api_token_sub,
@@ -94,69 +154,98 @@ def generate_token_set(id: str, is_admin: bool, firstname: str, lastname: str, e
         'email': email,
         'id': id,
         'admin': is_admin,
-        'iat': datetime.utcnow(),
-        'exp': access_token_exp
+        'iat': issued_on,
     }
 
-    payload_refresh_token = {
-        'iss': settings.api_token_iss,
-        'aud': settings.api_token_aud,
-        'sub': settings.api_token_sub,
-        'firstname': firstname,
-        'lastname': lastname,
-        'email': email,
-        'id': id,
-        'admin': is_admin,
-        'iat': datetime.utcnow(),
-        'exp': refresh_token_exp
-    }
+    return (
+        {**claims, 'exp': issued_on + settings.api_access_token_expiry},
+        {**claims, 'exp': issued_on + settings.api_refresh_token_expiry}
+    )
+
+
+def generate_token_set(id: str, is_admin: bool, firstname: str, lastname: str, email: EmailStr):
+    # Create payloads
+    payload_access_token, payload_refresh_token = get_token_claims(
+        id=id, is_admin=is_admin, firstname=firstname, lastname=lastname, email=email, issued_on=int(time.time()))
     
     # Generate access token
-    access_token = create_token(payload=payload_access_token, secret=settings.api_access_token_secret)
-    refresh_token = create_token(payload=payload_refresh_token, secret=settings.api_refresh_token_secret)
+    access_token = create_token(payload=payload_access_token, key_ring=get_access_key_ring())
+    refresh_token = create_token(payload=payload_refresh_token, key_ring=get_refresh_key_ring())
 
     return access_token, refresh_token
 
 
-async def is_reused_token(id: str, token: str) -> bool:
-   
-    # Check if token is in database
-    account_data = await get_account_with_refresh_token(id=id, refresh_token=token)
+def generate_token_sets(accounts: list[dict]) -> list[tuple[str, str]]:
+    """
+    This is used to mint token pairs for many accounts at once, e.g. for migrations or load tests.
+    The signing keys and the issue time are resolved once for the whole batch.
+    @params {accounts} - Dicts with the generate_token_set arguments: id, is_admin, firstname, lastname and email.
+    @returns {list} - The (access token, refresh token) pairs, in the order of the accounts
+    """
+    access_key, refresh_key = get_access_key_ring().get_signing_key(), get_refresh_key_ring().get_signing_key()
+    issued_on = int(time.time())
+
+    token_sets = []
+    for account in accounts:
+        payload_access_token, payload_refresh_token = get_token_claims(**account, issued_on=issued_on)
+        token_sets.append((
+            sign_token(payload=payload_access_token, ring_key=access_key),
+            sign_token(payload=payload_refresh_token, ring_key=refresh_key)
+        ))
+
+    return token_sets
 
-    return account_data
+
+async def is_reused_token(id: str, token: str, background_tasks: BackgroundTasks | None = None) -> tuple[dict | None, bool]:
+   
+    # Check if token is in database, and whether it has a session to rotate
+    return await get_account_with_refresh_token(id=id, refresh_token=token, background_tasks=background_tasks)
 
 
 async def invalidate_account_tokens(id: str):
     # Invalidating token
     logger.warning('Invalidating account tokens')
 
-    # Create reused refresh token obj
-    reuse_token = ReusedToken(id=id)
+    # Drop the stale local account
+    account_local_cache.invalidate(id)
+
+    # End every session of the account
+    await delete_account_token_sessions(id=id)
 
-    # Serialize
-    reuse_token_event = reuse_token.serialize()
+    # Serialize reused refresh token event
+    reuse_token_event = serialize_event(ReusedToken, {'id': id})
 
     # Emit invalidate token event
-    await produce_event(topic=settings.api_reused_refresh_token, value=reuse_token_event)
+    await produce_event(topic=settings.api_reused_refresh_token, value=reuse_token_event, key=id)
 
 
-async def update_account_token(old_token: str, new_token: str, id: str) -> None:
+async def update_account_token(old_token: str, new_token: str, id: str, device_ip: str | None = None, has_session: bool = True, background_tasks: BackgroundTasks | None = None) -> bool:
     # Encypt tokens
     encrypted_old_token = encrypt(value=old_token)
     encrypted_new_token = encrypt(value=new_token)
 
-    # Create update token obj
-    update_token = UpdateToken(
-        id=id,
-        old_token=encrypted_old_token,
-        new_token=encrypted_new_token
-    )
+    # Drop the stale local account
+    account_local_cache.invalidate(id)
+
+    # Move the session to the new token before it is handed out, a concurrent refresh may have taken it
+    if has_session:
+        if not await rotate_token_session(id=id, old_encrypted_token=encrypted_old_token, new_encrypted_token=encrypted_new_token, device_ip=device_ip):
+            return False
+    else:
+        # Tokens from before the session store get their first session
+        await create_token_session(id=id, encrypted_token=encrypted_new_token, device_ip=device_ip)
 
-    # Serialize
-    update_token_event = update_token.serialize()
+    # Serialize update token event
+    update_token_event = serialize_event(UpdateToken, {
+        'id': id,
+        'old_token': encrypted_old_token,
+        'new_token': encrypted_new_token
+    })
     
     # Emit update token event
-    await produce_event(topic=settings.api_update_token, value=update_token_event)
+    await produce_event(topic=settings.api_update_token, value=update_token_event, key=id, background_tasks=background_tasks)
+
+    return True
 
 
 async def invalidate_auth_token(email: EmailStr, token: str):
@@ -169,15 +258,12 @@ async def invalidate_auth_token(email: EmailStr, token: str):
     # Create key
     key = f"auth_token:{email}-{encrypted_token}"
     
-    # Create
-    invalidate_token = InvalidateCache(key=key)
-
-    # Serialize
-    invalidate_token_event = invalidate_token.serialize()
+    # Serialize invalidate cache event
+    invalidate_token_event = serialize_event(InvalidateCache, {'key': key})
 
     # Emit auth token invalidate
     logger.info('Emitting invalidate auth token event.')
-    await produce_event(topic=settings.api_invalidate_cache_topic, value=invalidate_token_event)
+    await produce_event(topic=settings.api_invalidate_cache_topic, value=invalidate_token_event, key=email)
 
 
 async def invalidate_otp(email: EmailStr, otp: str, purpose: str):
@@ -190,13 +276,10 @@ async def invalidate_otp(email: EmailStr, otp: str, purpose: str):
     # Create key
     key = f"otp:{email}-{encrypted_otp}-{purpose.lower()}"
     
-    # Create
-    invalidate_token = InvalidateCache(key=key)
-
-    # Serialize
-    invalidate_token_event = invalidate_token.serialize()
+    # Serialize invalidate cache event
+    invalidate_token_event = serialize_event(InvalidateCache, {'key': key})
 
     # Emit auth token invalidate
     logger.info('Emitting invalidate otp event.')
-    await produce_event(topic=settings.api_invalidate_cache_topic, value=invalidate_token_event)
+    await produce_event(topic=settings.api_invalidate_cache_topic, value=invalidate_token_event, key=email)
      
\ No newline at end of file
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+from core.connection.db_connection import token_session_col
+from core.model.token_model import TokenSession
+from core.utils.settings import settings
+from core.utils.init_log import logger
+
+
+def get_session_document(id: str, encrypted_token: str, device_ip: str | None = None) -> dict:
+    """
+    This is used to build the session document for an issued refresh token.
+    @params {id} - The account id.
+    @params {encrypted_token} - The encrypted refresh token.
+    @params {device_ip} - The IP address of the device the token was issued to.
+    @returns {dict} - The session document
+    """
+    now = datetime.now(timezone.utc)
+    return TokenSession(
+        _id=f"{id}-{encrypted_token}",
+        account_id=id,
+        device_ip=device_ip,
+        expires_on=now + timedelta(seconds=settings.api_refresh_token_expiry),
+        created_on=now
+    ).model_dump(by_alias=True)
+
+
+def get_session_filter(id: str, encrypted_token: str) -> dict:
+    return {'_id': f"{id}-{encrypted_token}"}
+
+
+def get_account_sessions_filter(id: str) -> dict:
+    return {'account_id': id}
+
+
+async def token_session_exists(id: str, encrypted_token: str) -> bool:
+    """
+    This is used to check a refresh token with a single lookup, however many sessions the account has.
+    @params {id} - The account id.
+    @params {encrypted_token} - The encrypted refresh token.
+    @returns {bool} - True if the token has a live session
+    """
+    session = await token_session_col.find_one(
+        filter=get_session_filter(id=id, encrypted_token=encrypted_token),
+        projection={'expires_on': 1}
+    )
+
+    # The TTL monitor only runs every minute
+    return session is not None and session['expires_on'].replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+
+
+async def create_token_session(id: str, encrypted_token: str, device_ip: str | None = None) -> None:
+    # A token without a session is rejected on refresh, so the caller must not hand it out
+    try:
+        await token_session_col.insert_one(get_session_document(id=id, encrypted_token=encrypted_token, device_ip=device_ip))
+    except Exception as err:
+        logger.error(f"Failed to create token session for account:{id} due to error: {str(err)}")
+        raise
+
+
+async def rotate_token_session(id: str, old_encrypted_token: str, new_encrypted_token: str, device_ip: str | None = None) -> bool:
+    """
+    This is used to move a session to a new refresh token. Deleting the old session is the reuse
+    check, so of two refreshes racing with the same token only one gets a new session.
+    @params {id} - The account id.
+    @params {old_encrypted_token} - The encrypted refresh token being replaced.
+    @params {new_encrypted_token} - The encrypted refresh token being issued.
+    @params {device_ip} - The IP address of the device the token is issued to.
+    @returns {bool} - False if the old session was already gone, i.e. the token was reused
+    """
+    try:
+        result = await token_session_col.delete_one(get_session_filter(id=id, encrypted_token=old_encrypted_token))
+        if result.deleted_count != 1:
+            return False
+
+        await token_session_col.insert_one(get_session_document(id=id, encrypted_token=new_encrypted_token, device_ip=device_ip))
+        return True
+    except Exception as err:
+        logger.error(f"Failed to rotate token session for account:{id} due to error: {str(err)}")
+        raise
+
+
+async def delete_token_session(id: str, encrypted_token: str) -> None:
+    try:
+        await token_session_col.delete_one(get_session_filter(id=id, encrypted_token=encrypted_token))
+    except Exception as err:
+        logger.error(f"Failed to delete token session for account:{id} due to error: {str(err)}")
+
+
+async def delete_account_token_sessions(id: str) -> None:
+    try:
+        await token_session_col.delete_many(get_account_sessions_filter(id=id))
+    except Exception as err:
+        logger.error(f"Failed to delete token sessions for account:{id} due to error: {str(err)}")
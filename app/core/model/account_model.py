@@ -40,6 +40,27 @@ class AccountInDB(AvroBaseModel):
     created_on: datetime = Field(exclude=True, description='Timestamp used to track account creation date.')
 
 
+class AccountLogin(AvroBaseModel):
+    id: str = Field(description="A unique string representing the account id", alias='_id')
+    email: EmailStr = Field(description="The account's email address")
+    phone_number: str = Field(description="The account's phone number")
+    firstname: str = Field(description="The user's first name")
+    lastname: str = Field(description="The user's lastname")
+    hashed_password: str = Field(exclude=True, description='Account password hashed')
+    email_verified: bool = Field(default=False, description="The verification state of the account's email")
+    phone_verified: bool = Field(default=False, description="The verification state of the account's phone number")
+    active_device_count: int = Field(default=0, exclude=True, description='The number of active devices connecting to the account')
+    role: Role = Field(description='Account role')
+
+
+class AccountRefresh(AvroBaseModel):
+    id: str = Field(description="A unique string representing the account id", alias='_id')
+    email: EmailStr = Field(description="The account's email address")
+    firstname: str = Field(description="The user's first name")
+    lastname: str = Field(description="The user's lastname")
+    role: Role = Field(description='Account role')
+
+
 class LoginPassword(AvroBaseModel):    
     password: str = Field(description='A secret string representing the account password')
     device_info: Device = Field(description='Device data')
@@ -53,6 +74,11 @@ class AccountLoginWithPhone(LoginPassword):
     phone_number: Optional[str] = Field(description='A string representing a verified account phone number')
     
 
+class UpdatePasswordHash(AvroBaseModel):
+    id: str = Field(description='Used to identify the account')
+    hashed_password: str = Field(description='Account password hashed with the current policy')
+
+
 class Logout(AvroBaseModel):
     email: EmailStr = Field(description='An email string used to identify an account')
     refresh_token: str = Field(description='A string representing the refresh token.')
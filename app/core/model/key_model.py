@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class KeyRingEntry(BaseModel):
+    kid: str = Field(description='Key id carried in the token header')
+    algorithm: str = Field(description='Signing algorithm, e.g. HS256, RS256 or ES256')
+    secret: str | None = Field(default=None, description='Shared secret for HMAC algorithms')
+    private_key_path: str | None = Field(default=None, description='PEM private key for asymmetric algorithms, omitted for verify-only keys')
+    public_key_path: str | None = Field(default=None, description='PEM public key for asymmetric algorithms')
+    not_before: datetime | None = Field(default=None, description='When the key starts signing. Keys are published for verification before then.')
+    not_after: datetime | None = Field(default=None, description='When tokens signed with the key stop verifying')
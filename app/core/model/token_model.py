@@ -51,6 +51,14 @@ class AssignToken(AvroBaseModel):
     token: str = Field(description='Encrypted refresh token')
     device_info: Device = Field(description='Device meta data.')
 
+class TokenSession(BaseModel):
+    id: str = Field(description="The '{account_id}-{encrypted token}' fingerprint", alias='_id')
+    account_id: str = Field(description='Used to identify the account')
+    device_ip: str | None = Field(default=None, description='The IP address of the device the token was issued to')
+    expires_on: datetime = Field(description='When the session expires and is removed')
+    created_on: datetime = Field(description='When the token was issued')
+
+
 class ReusedToken(AvroBaseModel):
     id: str = Field(description='Used to identify the account')
 
@@ -61,6 +69,22 @@ class UpdateToken(AvroBaseModel):
     new_token: str = Field(description='Encrypted new refresh token')
 
 
+class IntrospectTokens(BaseModel):
+    access_tokens: list[str] = Field(default=[], description='Access tokens to verify')
+    refresh_tokens: list[str] = Field(default=[], description='Refresh tokens to verify and check for revocation')
+
+
+class TokenIntrospection(BaseModel):
+    active: bool = Field(description='Whether the token is valid and not revoked')
+    claims: dict | None = Field(default=None, description='The token claims, for active tokens')
+    error: str | None = Field(default=None, description='Why the token is not active')
+
+
+class IntrospectTokensResponse(BaseModel):
+    access_tokens: list[TokenIntrospection] = Field(description='Results in the order the access tokens were sent')
+    refresh_tokens: list[TokenIntrospection] = Field(description='Results in the order the refresh tokens were sent')
+
+
 class VerifyTokenResponse(AvroBaseModel):
     iss: str = Field(description='Company issueing the token')
     aud: str = Field(description='The clients')
@@ -6,3 +6,17 @@ credential_error = HTTPException(
                 detail='Invalid token',
                 headers={'WWW-Authenticate': "Bearer"}
             )
+
+# Overloaded error
+overloaded_error = HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Service busy, try again later.',
+                headers={'Retry-After': '1'}
+            )
+
+# Too many requests error
+too_many_requests_error = HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail='Too many login attempts, try again later.',
+                headers={'Retry-After': '60'}
+            )
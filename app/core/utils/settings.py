@@ -29,6 +29,11 @@ class Settings(BaseSettings):
     api_redis_password: str
     api_redis_decode_response: bool
     api_redis_host_local: str
+    api_redis_max_connections: int = 100
+    api_redis_warm_connections: int = 10
+    api_redis_socket_timeout: float = 2.0
+    api_redis_socket_connect_timeout: float = 2.0
+    api_redis_health_check_interval: int = 30
 
     # API constants
     min_password_length: int
@@ -53,8 +58,33 @@ class Settings(BaseSettings):
     api_token_iss: str
     api_token_sub: str
 
+    # Asymmetric access token signing, the shared secret is used when no algorithm is set
+    api_access_token_algorithm: str = ''
+    api_access_token_kid: str = ''
+    api_access_token_private_key_path: str = ''
+    api_access_token_public_key_path: str = ''
+    api_jwks_max_age: int = 3600
+
+    # Key rings, lists of KeyRingEntry. Without entries the single key above is used.
+    # Keep an entry with kid '' until tokens issued before the ring have expired.
+    api_access_token_key_ring: list[dict] = []
+    api_refresh_token_key_ring: list[dict] = []
+
+    # JWT implementation, 'jose' or 'native'
+    api_jwt_backend: str = 'jose'
+
     # DB credentials
     api_db_url: str
+    api_db_create_indexes: bool = True
+    api_db_max_pool_size: int = 100
+    api_db_min_pool_size: int = 10
+    api_db_max_idle_time_ms: int = 60000
+    api_db_connect_timeout_ms: int = 5000
+    api_db_server_selection_timeout_ms: int = 5000
+    api_db_wait_queue_timeout_ms: int = 2000
+
+    # Refresh token sessions, fall back to the account tokens array until migrated
+    api_token_session_fallback: bool = True
 
     # Streaming topics    
     api_cache_topic: str
@@ -66,6 +96,71 @@ class Settings(BaseSettings):
     api_update_token: str
     api_reused_refresh_token: str
     api_invalidate_cache_topic: str
+    api_update_password_hash_topic: str = 'update_password_hash'
+    api_account_created_topic: str = 'account_created'
+    api_cache_invalidation_audit: bool = False
+
+    # In-process account cache
+    api_account_local_cache_size: int = 10000
+    api_account_local_cache_ttl: int = 30
+    api_account_cache_ttl: int = 300
+
+    # Verified access token claims
+    api_verified_token_cache_size: int = 100000
+
+    # Batch token introspection
+    api_introspect_max_tokens: int = 100
+
+    # Revoked refresh token filter
+    api_revoked_token_filter_capacity: int = 1000000
+    api_revoked_token_filter_error_rate: float = 0.001
+    api_revoked_token_filter_rebuild_interval: int = 3600
+    api_revoked_token_filter_scan_count: int = 1000
+
+    # Password hashing pool
+    api_password_hash_executor: str = 'thread'
+    api_password_hash_workers: int = 4
+    api_password_hash_queue_size: int = 64
+    api_password_hash_queue_timeout: float = 2.0
+
+    # Password policy
+    api_password_hash_scheme: str = 'bcrypt'
+    api_password_bcrypt_rounds: int = 12
+    api_password_scrypt_rounds: int = 14
+
+    # Login rate limits
+    api_login_rate_limit_enabled: bool = True
+    api_login_ip_rate: float = 1.0
+    api_login_ip_burst: int = 10
+    api_login_ip_bucket_count: int = 100000
+    api_login_account_limit: int = 10
+    api_login_account_window: int = 300
+
+    # Unknown login identifiers
+    api_missing_account_ttl: int = 60
+    api_missing_account_cache_size: int = 100000
+
+    # Topic provisioning
+    api_topic_partitions: int = 10
+    api_topic_replication_factor: int = 3
+    api_topic_refresh_interval: int = 300
+
+    # Event pipeline
+    api_event_queue_size: int = 10000
+    api_event_batch_size: int = 500
+    api_event_linger_ms: int = 5
+    api_event_shutdown_timeout: int = 10
+    api_event_ack_timeout: float = 2.0
+    api_event_durability: dict[str, str] = {}
+
+    # Event outbox
+    api_event_outbox_path: str = 'event_outbox.sqlite3'
+    api_event_outbox_replay_interval: float = 1.0
+    api_event_outbox_replay_batch_size: int = 500
+
+    # Event consumer restarts, doubling up to the max
+    api_event_consumer_retry_seconds: float = 1.0
+    api_event_consumer_max_retry_seconds: float = 30.0
 
      # Event Streaming Server
     api_event_streaming_host: str
@@ -3,20 +3,90 @@ import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 
 from v1.auth_route import auth
+from v1.stats_route import stats
 from core.utils.settings import settings
 
 from contextlib import asynccontextmanager
 from starlette.middleware.base import BaseHTTPMiddleware
 from core.middleware.process_time_header_middleware import add_process_time_header
+from core.connection.event_connection import start_producer, stop_producer
+from core.helper.producer_helper import start_topic_registry, stop_topic_registry
+from core.event.event_pipeline import start_event_pipeline, stop_event_pipeline
+from core.event.event_outbox import start_event_outbox, stop_event_outbox
+from core.event.consume_event import start_event_consumer, stop_event_consumer
+from core.helper.cache_helper import register_account_cache_handlers
+from core.helper.revoked_token_filter_helper import register_revoked_token_handlers, start_revoked_token_filter, stop_revoked_token_filter
+from core.helper.password_helper import shutdown_password_executor
+from core.helper.negative_cache_helper import register_negative_cache_handlers
+from core.connection.db_connection import connect_db, close_db, create_indexes
+from core.connection.cache_connection import connect_cache, close_cache
 
 
 async def on_startup():
     print('Starting auth service api')
+
+    # Open database and cache connections before accepting traffic
+    try:
+        await connect_db()
+        await connect_cache()
+    except Exception as err:
+        print(f'Failed to warm up connections, will connect on first request: {str(err)}')
+
+    # Make sure account lookups are backed by indexes
+    if settings.api_db_create_indexes:
+        await create_indexes()
+
+    # Start the shared event producer
+    try:
+        await start_producer()
+    except Exception as err:
+        print(f'Failed to start event producer, will retry on first event: {str(err)}')
+
+    # Provision event topics and keep the topic registry fresh
+    await start_topic_registry()
+
+    # Open the event outbox and replay anything left from a previous run
+    await start_event_outbox()
+
+    # Start the batched event pipeline
+    await start_event_pipeline()
+
+    # Listen for events that invalidate local caches
+    register_account_cache_handlers()
+    register_revoked_token_handlers()
+    register_negative_cache_handlers()
+    await start_event_consumer()
+
+    # Build the revoked token filter once the revoke stream is followed
+    await start_revoked_token_filter()
     
 
 async def on_shut_down():
     print('Shutting down auth service api')
 
+    # Stop listening for cache invalidations
+    await stop_event_consumer()
+    await stop_revoked_token_filter()
+
+    # Drain queued events
+    await stop_event_pipeline()
+
+    # Stop replaying and close the event outbox
+    await stop_event_outbox()
+
+    # Stop the topic registry
+    await stop_topic_registry()
+
+    # Flush and close the shared event producer
+    await stop_producer()
+
+    # Stop the password hashing pool
+    shutdown_password_executor()
+
+    # Close database and cache connections
+    close_db()
+    await close_cache()
+
 
 # init app lifecyle
 @asynccontextmanager
@@ -56,6 +126,7 @@ app.add_middleware(BaseHTTPMiddleware, dispatch=add_process_time_header)
 
 # Add route
 app.include_router(auth)
+app.include_router(stats)
 
 # start the server
 if __name__ == '__main__':
@@ -0,0 +1,26 @@
+"""
+Calibrates the password hash cost against a target verify time on this host.
+
+Run from the app directory:
+    python -m scripts.calibrate_password_hash --target-ms 250 --scheme bcrypt
+"""
+import argparse
+from core.helper.password_helper import calibrate_rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Calibrate the password hash cost for this host.')
+    parser.add_argument('--target-ms', type=float, default=250, help='Target verify time in milliseconds.')
+    parser.add_argument('--scheme', choices=['bcrypt', 'scrypt'], action='append',
+                        help='Scheme to calibrate, may be repeated. Defaults to bcrypt and scrypt.')
+    args = parser.parse_args()
+
+    for scheme in args.scheme or ['bcrypt', 'scrypt']:
+        rounds, seconds = calibrate_rounds(scheme=scheme, target_seconds=args.target_ms / 1000)
+        print(f"{scheme}: rounds={rounds} verify={seconds * 1000:.1f}ms")
+        print(f"  API_PASSWORD_HASH_SCHEME={scheme}")
+        print(f"  API_PASSWORD_{scheme.upper()}_ROUNDS={rounds}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Checks that every accounts and token session query is served by an index.
+
+Runs explain() for each query against the configured database and exits
+non-zero if any winning plan contains a collection scan.
+
+Run from the app directory:
+    python -m scripts.check_query_plans --create-indexes
+"""
+import argparse
+import asyncio
+import sys
+from core.connection.db_connection import account_col, token_session_col, create_indexes
+from core.helper.db_helper import get_email_filter, get_id_filter, get_phone_number_filter, get_id_and_refresh_token_filter
+from core.helper.token_session_helper import get_session_filter, get_account_sessions_filter
+
+
+# The filters built by db_helper, with placeholder values.
+# get_account_by_id, get_refresh_account_by_id and get_account_document use the _id filter.
+ACCOUNT_QUERIES = {
+    'get_account_by_email': get_email_filter(email='johndoe@example.com'),
+    'get_account_by_id': get_id_filter(id='7845941214687'),
+    'get_account_by_phone_number': get_phone_number_filter(phone_number='9151234789'),
+    'get_account_with_id_and_refresh_token': get_id_and_refresh_token_filter(id='7845941214687', encrypted_token='encrypted-refresh-token'),
+}
+
+# The filters built by token_session_helper
+TOKEN_SESSION_QUERIES = {
+    'token_session_exists': get_session_filter(id='7845941214687', encrypted_token='encrypted-refresh-token'),
+    'delete_account_token_sessions': get_account_sessions_filter(id='7845941214687'),
+}
+
+
+def get_plan_stages(plan: dict) -> list[str]:
+    stages = [plan.get('stage')]
+    for child in plan.get('inputStages', []) + [plan[key] for key in ('inputStage', 'queryPlan') if key in plan]:
+        stages += get_plan_stages(child)
+    return stages
+
+
+async def check_query_plans(ensure_indexes: bool) -> bool:
+    if ensure_indexes:
+        await create_indexes()
+
+    passed = True
+    queries = [(account_col, name, filter) for name, filter in ACCOUNT_QUERIES.items()]
+    queries += [(token_session_col, name, filter) for name, filter in TOKEN_SESSION_QUERIES.items()]
+
+    for collection, name, filter in queries:
+        explanation = await collection.find(filter).limit(1).explain()
+        stages = [stage for stage in get_plan_stages(explanation['queryPlanner']['winningPlan']) if stage]
+
+        ok = 'COLLSCAN' not in stages
+        passed = passed and ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {' <- '.join(stages)}")
+
+    return passed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Check that accounts queries are served by an index.')
+    parser.add_argument('--create-indexes', action='store_true', help='Create the accounts indexes before checking.')
+    args = parser.parse_args()
+
+    if not asyncio.run(check_query_plans(ensure_indexes=args.create_indexes)):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
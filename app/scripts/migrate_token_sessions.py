@@ -0,0 +1,56 @@
+"""
+Copies refresh tokens from the accounts 'tokens' arrays into the token session collection.
+
+Legacy tokens carry no issue time, so each session gets the full refresh token
+lifetime from now. Re-running is safe, sessions that already exist are kept.
+
+Run from the app directory:
+    python -m scripts.migrate_token_sessions --batch-size 500
+    python -m scripts.migrate_token_sessions --unset-tokens
+"""
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from core.connection.db_connection import account_col, token_session_col, create_indexes
+from core.helper.token_session_helper import get_session_document
+
+
+async def migrate_token_sessions(batch_size: int, unset_tokens: bool) -> tuple[int, int]:
+    await create_indexes()
+
+    accounts, sessions, operations = 0, 0, []
+    async for account in account_col.find({'tokens.0': {'$exists': True}}, projection={'tokens': 1}):
+        accounts += 1
+        for encrypted_token in account['tokens']:
+            session = get_session_document(id=account['_id'], encrypted_token=encrypted_token)
+            operations.append(UpdateOne({'_id': session['_id']}, {'$setOnInsert': session}, upsert=True))
+
+        if len(operations) >= batch_size:
+            result = await token_session_col.bulk_write(operations, ordered=False)
+            sessions += result.upserted_count
+            operations = []
+
+    if operations:
+        result = await token_session_col.bulk_write(operations, ordered=False)
+        sessions += result.upserted_count
+
+    # Drop the arrays once every token has a session
+    if unset_tokens:
+        await account_col.update_many({'tokens.0': {'$exists': True}}, {'$unset': {'tokens': ''}})
+
+    return accounts, sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Migrate account refresh tokens into token sessions.')
+    parser.add_argument('--batch-size', type=int, default=500, help='Sessions written per bulk write.')
+    parser.add_argument('--unset-tokens', action='store_true',
+                        help='Remove the tokens arrays from the accounts after copying them.')
+    args = parser.parse_args()
+
+    accounts, sessions = asyncio.run(migrate_token_sessions(batch_size=args.batch_size, unset_tokens=args.unset_tokens))
+    print(f"Migrated {sessions} token sessions from {accounts} accounts.")
+
+
+if __name__ == '__main__':
+    main()
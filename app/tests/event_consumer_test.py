@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from core.event import consume_event
+from core.helper.local_cache_helper import LocalCache
+
+
+class FlakyConsumer:
+    """
+    Fails to start the first time, then delivers one message and loses the connection.
+    """
+
+    starts = 0
+
+    def __init__(self, *topics, **config):
+        self.topics = topics
+
+    async def start(self):
+        FlakyConsumer.starts += 1
+        if FlakyConsumer.starts == 1:
+            raise ConnectionError('Kafka is unreachable')
+
+    async def stop(self):
+        pass
+
+    def __aiter__(self):
+        return self.messages()
+
+    async def messages(self):
+        yield SimpleNamespace(topic=self.topics[0], value=b'event')
+        raise ConnectionError('Connection reset by peer')
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return 'asyncio'
+
+
+@pytest.mark.anyio
+async def test_event_consumer_restarts_after_failures(monkeypatch):
+    received, epochs = [], []
+    FlakyConsumer.starts = 0
+    monkeypatch.setattr(consume_event, 'AIOKafkaConsumer', FlakyConsumer)
+    monkeypatch.setattr(consume_event, 'event_handlers', {'test_topic': [received.append]})
+    monkeypatch.setattr(consume_event, 'consumer_start_handlers', [lambda: epochs.append(consume_event.get_event_consumer_epoch())])
+    monkeypatch.setattr(consume_event.settings, 'api_event_consumer_retry_seconds', 0.01)
+    monkeypatch.setattr(consume_event.settings, 'api_event_consumer_max_retry_seconds', 0.01)
+
+    await consume_event.start_event_consumer()
+    try:
+        for _ in range(100):
+            if len(received) >= 2:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await consume_event.stop_event_consumer()
+
+    # Failed start retried, and a lost connection replaced with a new epoch each time
+    assert FlakyConsumer.starts >= 3
+    assert received[:2] == [b'event', b'event']
+    assert epochs[:2] == [1, 2]
+    assert not consume_event.is_event_consumer_running()
+
+
+def test_local_cache_following_events_bypassed_while_consumer_down(monkeypatch):
+    cache = LocalCache(maxsize=10, ttl=60, follows_events=True)
+
+    monkeypatch.setattr(consume_event, 'consumer_epoch', None)
+    cache.set('key', 'value')
+    assert cache.get('key') is None
+
+    monkeypatch.setattr(consume_event, 'consumer_epoch', 1)
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+
+    # A restart may have missed invalidations
+    monkeypatch.setattr(consume_event, 'consumer_epoch', 2)
+    assert cache.get('key') is None
+
+
+def test_local_cache_not_following_events_always_used(monkeypatch):
+    cache = LocalCache(maxsize=10, ttl=60)
+
+    monkeypatch.setattr(consume_event, 'consumer_epoch', None)
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
@@ -0,0 +1,174 @@
+from fastapi import status
+import pytest
+import httpx
+from typing import AsyncIterator
+from redis.exceptions import ConnectionError as RedisConnectionError
+from app.main import app
+from core.utils.settings import settings
+from core.helper import cache_helper
+from core.helper.encryption_helper import encrypt
+from core.helper.token_helper import generate_token_set
+from core.helper.jwt_backend_helper import NativeBackend
+
+
+# Introspection url
+introspect_url: str = '/api/v1/auth/access-token/introspect/'
+
+
+# Test account the tokens are issued to
+test_account = {
+    'id': '7845941214687',
+    'is_admin': False,
+    'firstname': 'John',
+    'lastname': 'Doe',
+    'email': 'johndoe@example.com',
+}
+
+
+class FailingPipeline:
+    """
+    Queues commands like a Redis pipeline and loses the connection when they are sent.
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def exists(self, key: bytes):
+        self.commands.append(key)
+
+    async def execute(self):
+        raise RedisConnectionError('Connection reset by peer')
+
+
+class FailingRedis:
+    def pipeline(self, transaction: bool = True) -> FailingPipeline:
+        return FailingPipeline()
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return 'asyncio'
+
+
+@pytest.fixture(scope="session")
+async def client() -> AsyncIterator[httpx.AsyncClient]:
+    async with httpx.AsyncClient(app=app, base_url='http://testserver') as client:
+        print("client is ready")
+        yield client
+
+
+@pytest.mark.anyio
+async def test_introspect_tokens_invalid_tokens(client: httpx.AsyncClient):
+    # Body
+    test_body = {
+        'access_tokens': ['asdasdafdakjdasjdkljlskdj', 'qwdqwdqwdqwd'],
+        'refresh_tokens': ['asdasdafdakjdasjdkljlskdj'],
+    }
+
+    # Send request
+    response = await client.post(introspect_url, json=test_body)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result['active'] for result in response.json()['access_tokens']] == [False, False]
+    assert [result['active'] for result in response.json()['refresh_tokens']] == [False]
+
+
+@pytest.mark.anyio
+async def test_introspect_tokens_malformed_kid(client: httpx.AsyncClient):
+    access_token, refresh_token = generate_token_set(**test_account)
+
+    # Token whose header kid is a list instead of a string
+    malformed_kid_token = NativeBackend().encode(claims={'id': test_account['id']}, key=b'test-secret', algorithm='HS256', headers={'kid': ['x']})
+
+    # Body
+    test_body = {
+        'access_tokens': [malformed_kid_token, access_token],
+        'refresh_tokens': [malformed_kid_token, refresh_token],
+    }
+
+    # Send request
+    response = await client.post(introspect_url, json=test_body)
+
+    # Only the malformed token is inactive, the rest of the batch is unaffected
+    assert response.status_code == status.HTTP_200_OK
+    assert [result['active'] for result in response.json()['access_tokens']] == [False, True]
+    assert [result['active'] for result in response.json()['refresh_tokens']][0] is False
+
+
+@pytest.mark.anyio
+async def test_introspect_tokens_failed_too_many_tokens(client: httpx.AsyncClient):
+    # Body
+    test_body = {
+        'access_tokens': ['asdasdafdakjdasjdkljlskdj'] * (settings.api_introspect_max_tokens + 1),
+    }
+
+    # Send request
+    response = await client.post(introspect_url, json=test_body)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.anyio
+async def test_introspect_tokens_valid_access_token(client: httpx.AsyncClient):
+    access_token, _ = generate_token_set(**test_account)
+
+    # Body
+    test_body = {
+        'access_tokens': [access_token],
+    }
+
+    # Send request
+    response = await client.post(introspect_url, json=test_body)
+
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()['access_tokens'][0]
+    assert result['active'] is True
+    assert result['claims']['id'] == test_account['id']
+
+
+@pytest.mark.anyio
+async def test_introspect_tokens_revoked_refresh_token(client: httpx.AsyncClient):
+    _, refresh_token = generate_token_set(**test_account)
+    _, revoked_refresh_token = generate_token_set(**{**test_account, 'firstname': 'Jane'})
+
+    # Revoke one token the way revoke_refresh_token caches it
+    await cache_helper.redis.set(f"refresh_token:{test_account['id']}-{encrypt(value=revoked_refresh_token)}".encode(), b'1', ex=60)
+
+    # Body
+    test_body = {
+        'refresh_tokens': [refresh_token, revoked_refresh_token, 'asdasdafdakjdasjdkljlskdj'],
+    }
+
+    # Send request
+    response = await client.post(introspect_url, json=test_body)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result['active'] for result in response.json()['refresh_tokens']] == [True, False, False]
+    assert response.json()['refresh_tokens'][1]['error'] == 'Revoked refresh token'
+
+
+@pytest.mark.anyio
+async def test_introspect_tokens_redis_failure(client: httpx.AsyncClient, monkeypatch):
+    _, refresh_token = generate_token_set(**test_account)
+    _, other_refresh_token = generate_token_set(**{**test_account, 'firstname': 'Jane'})
+
+    # The connection drops once the batch is sent
+    monkeypatch.setattr(cache_helper, 'redis', FailingRedis())
+
+    # Body
+    test_body = {
+        'refresh_tokens': [refresh_token, 'asdasdafdakjdasjdkljlskdj', other_refresh_token],
+    }
+
+    # Send request
+    response = await client.post(introspect_url, json=test_body)
+
+    # Like a single refresh token check, the batch falls back to the signature and claims result
+    assert response.status_code == status.HTTP_200_OK
+    assert [result['active'] for result in response.json()['refresh_tokens']] == [True, False, True]
@@ -0,0 +1,42 @@
+from fastapi import status
+import pytest
+import httpx
+from typing import AsyncIterator
+from app.main import app
+
+
+# JWKS url
+jwks_url: str = '/api/v1/auth/.well-known/jwks.json'
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return 'asyncio'
+
+
+@pytest.fixture(scope="session")
+async def client() -> AsyncIterator[httpx.AsyncClient]:
+    async with httpx.AsyncClient(app=app, base_url='http://testserver') as client:
+        print("client is ready")
+        yield client
+
+
+@pytest.mark.anyio
+async def test_get_jwks_successful(client: httpx.AsyncClient):
+    # Send request
+    response = await client.get(jwks_url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert 'keys' in response.json()
+    assert 'max-age' in response.headers.get('Cache-Control')
+
+
+@pytest.mark.anyio
+async def test_get_jwks_not_modified(client: httpx.AsyncClient):
+    # Send request
+    response = await client.get(jwks_url)
+
+    # Revalidate with the returned etag
+    response = await client.get(jwks_url, headers={'If-None-Match': response.headers.get('ETag')})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
@@ -0,0 +1,156 @@
+import time
+import itertools
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa, ec, ed25519
+from core.helper.jwt_backend_helper import JWT_BACKENDS, JoseBackend, NativeBackend, InvalidTokenError
+from benchmarks.key_helper import get_pem_pair
+
+
+audience, issuer, subject = 'clients', 'auth', 'access'
+
+
+# Test key material per algorithm, as (signing material, verification material)
+hmac_secret = 'a-shared-secret-of-reasonable-length'
+rsa_pem_pair = get_pem_pair(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+test_keys = {
+    'HS256': (hmac_secret, hmac_secret),
+    'HS384': (hmac_secret, hmac_secret),
+    'HS512': (hmac_secret, hmac_secret),
+    'RS256': rsa_pem_pair,
+    'RS384': rsa_pem_pair,
+    'RS512': rsa_pem_pair,
+    'ES256': get_pem_pair(ec.generate_private_key(ec.SECP256R1())),
+    'ES384': get_pem_pair(ec.generate_private_key(ec.SECP384R1())),
+    'ES512': get_pem_pair(ec.generate_private_key(ec.SECP521R1())),
+}
+
+# Backends signing and verifying each other's tokens
+backend_pairs = list(itertools.product(JWT_BACKENDS.values(), repeat=2))
+
+
+def get_claims(**overrides) -> dict:
+    claims = {
+        'iss': issuer,
+        'aud': audience,
+        'sub': subject,
+        'id': '7845941214687',
+        'iat': int(time.time()),
+        'exp': int(time.time()) + 60,
+    }
+    claims.update(overrides)
+    return {name: value for name, value in claims.items() if value is not None}
+
+
+def encode(backend, claims: dict, algorithm: str = 'HS256') -> str:
+    return backend.encode(claims=claims, key=backend.load_signing_key(algorithm, test_keys[algorithm][0]), algorithm=algorithm)
+
+
+def decode(backend, token: str, algorithm: str = 'HS256') -> dict:
+    key = backend.load_verification_key(algorithm, test_keys[algorithm][1])
+    return backend.decode(token=token, key=key, algorithm=algorithm, audience=audience, issuer=issuer, subject=subject)
+
+
+@pytest.mark.parametrize('algorithm', list(test_keys))
+@pytest.mark.parametrize('signer,verifier', backend_pairs)
+def test_cross_backend_sign_and_verify(signer, verifier, algorithm):
+    claims = get_claims()
+    token = encode(signer(), claims, algorithm)
+
+    assert decode(verifier(), token, algorithm) == claims
+    assert verifier().get_unverified_header(token)['alg'] == algorithm
+
+
+@pytest.mark.parametrize('signer,verifier', backend_pairs)
+def test_cross_backend_kid_header(signer, verifier):
+    backend = signer()
+    token = backend.encode(claims=get_claims(), key=backend.load_signing_key('HS256', hmac_secret), algorithm='HS256', headers={'kid': 'key-1'})
+
+    assert verifier().get_unverified_header(token)['kid'] == 'key-1'
+
+
+@pytest.mark.parametrize('claims', [
+    get_claims(exp=int(time.time()) - 60),
+    get_claims(nbf=int(time.time()) + 60),
+    get_claims(aud='other-clients'),
+    get_claims(aud=['other-clients', 'more-clients']),
+    get_claims(iss='other-issuer'),
+    get_claims(iss=None),
+    get_claims(sub='refresh'),
+    get_claims(sub=7845941214687),
+    get_claims(iat='yesterday'),
+    get_claims(jti=7845941214687),
+], ids=['expired', 'not-before', 'audience', 'audience-list', 'issuer', 'missing-issuer', 'subject', 'subject-type', 'iat-type', 'jti-type'])
+@pytest.mark.parametrize('backend', JWT_BACKENDS.values())
+def test_invalid_claims_rejected(backend, claims):
+    token = encode(JoseBackend(), claims)
+
+    with pytest.raises(InvalidTokenError):
+        decode(backend(), token)
+
+
+@pytest.mark.parametrize('backend', JWT_BACKENDS.values())
+def test_optional_claims_accepted(backend):
+    claims = get_claims(aud=[audience, 'other-clients'], nbf=int(time.time()) - 60, jti='token-1')
+    token = encode(JoseBackend(), claims)
+
+    assert decode(backend(), token) == claims
+
+
+@pytest.mark.parametrize('backend', JWT_BACKENDS.values())
+def test_tampered_token_rejected(backend):
+    header, payload, signature = encode(backend(), get_claims()).split('.')
+
+    # Payload from another token, signature of this one
+    other_payload = encode(backend(), get_claims(id='1234567890')).split('.')[1]
+
+    with pytest.raises(InvalidTokenError):
+        decode(backend(), '.'.join([header, other_payload, signature]))
+
+
+@pytest.mark.parametrize('token', ['', 'asdasdafdakjdasjdkljlskdj', 'a.b', 'a.b.c', 'a.b.c.d', '!!!.@@@.###'])
+@pytest.mark.parametrize('backend', JWT_BACKENDS.values())
+def test_malformed_token_rejected(backend, token):
+    with pytest.raises(InvalidTokenError):
+        decode(backend(), token)
+
+
+@pytest.mark.parametrize('signed_with,verified_with', [('HS256', 'HS384'), ('RS256', 'RS384'), ('ES256', 'HS256')])
+@pytest.mark.parametrize('backend', JWT_BACKENDS.values())
+def test_algorithm_mismatch_rejected(backend, signed_with, verified_with):
+    token = encode(backend(), get_claims(), signed_with)
+
+    with pytest.raises(InvalidTokenError):
+        decode(backend(), token, verified_with)
+
+
+@pytest.mark.parametrize('algorithm,material', [
+    ('ES256', rsa_pem_pair[1]),
+    ('ES256', test_keys['ES384'][1]),
+    ('RS256', test_keys['ES256'][1]),
+    ('HS256', rsa_pem_pair[1]),
+])
+@pytest.mark.parametrize('backend', JWT_BACKENDS.values())
+def test_mismatched_verification_key_rejected(backend, algorithm, material):
+    with pytest.raises(ValueError):
+        backend().load_verification_key(algorithm, material)
+
+
+@pytest.mark.parametrize('algorithm,material', [
+    ('ES512', test_keys['ES256'][0]),
+    ('RS256', test_keys['ES256'][0]),
+])
+@pytest.mark.parametrize('backend', JWT_BACKENDS.values())
+def test_mismatched_signing_key_rejected(backend, algorithm, material):
+    with pytest.raises(ValueError):
+        backend().load_signing_key(algorithm, material)
+
+
+def test_native_backend_eddsa_sign_and_verify():
+    signing_material, verification_material = get_pem_pair(ed25519.Ed25519PrivateKey.generate())
+    backend = NativeBackend()
+    claims = get_claims()
+
+    token = backend.encode(claims=claims, key=backend.load_signing_key('EdDSA', signing_material), algorithm='EdDSA')
+    key = backend.load_verification_key('EdDSA', verification_material)
+
+    assert backend.decode(token=token, key=key, algorithm='EdDSA', audience=audience, issuer=issuer, subject=subject) == claims
@@ -0,0 +1,103 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import BackgroundTasks
+from core.enums.auth_enum import AuthType
+from core.model.account_model import AccountLogin
+from core.helper import account_helper, cache_helper
+
+
+# Test account, as stored before the rehash
+test_account = {
+    '_id': '7845941214687',
+    'email': 'johndoe@example.com',
+    'phone_number': '9151234789',
+    'firstname': 'John',
+    'lastname': 'Doe',
+    'hashed_password': 'old-hash',
+    'email_verified': True,
+    'role': {'name': 'user', 'permissions': []},
+}
+
+# Test login credentials
+test_login = SimpleNamespace(email=test_account['email'], password='stringst123')
+
+
+class RecordingRedis:
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    async def delete(self, key: bytes):
+        self.calls.append(('delete', key.decode()))
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return 'asyncio'
+
+
+@pytest.fixture
+def calls(monkeypatch) -> list:
+    calls = []
+
+    async def is_missing_account(identifier):
+        return False
+
+    async def get_account_from_cache_by_identifier(field, value):
+        return None
+
+    async def get_account_by_email(email):
+        return AccountLogin(**test_account)
+
+    async def get_account_document(id):
+        return dict(test_account)
+
+    async def cache_account(data):
+        calls.append(('cache', data['hashed_password']))
+
+    async def produce_event(topic, value, key, background_tasks=None):
+        calls.append(('event', topic))
+
+    # Cache miss, the database still holds the old hash
+    monkeypatch.setattr(account_helper, 'is_missing_account', is_missing_account)
+    monkeypatch.setattr(account_helper, 'get_account_from_cache_by_identifier', get_account_from_cache_by_identifier)
+    monkeypatch.setattr(account_helper, 'get_account_by_email', get_account_by_email)
+    monkeypatch.setattr(account_helper, 'produce_event', produce_event)
+    monkeypatch.setattr(cache_helper, 'get_account_document', get_account_document)
+    monkeypatch.setattr(cache_helper, 'cache_account', cache_account)
+    monkeypatch.setattr(cache_helper, 'produce_event', produce_event)
+    monkeypatch.setattr(cache_helper, 'redis', RecordingRedis(calls))
+    return calls
+
+
+@pytest.mark.anyio
+async def test_login_cache_miss_then_rehash_caches_new_hash(calls, monkeypatch):
+    async def verify_and_update_password_in_pool(plain_password, hashed_password):
+        return True, 'new-hash'
+
+    monkeypatch.setattr(account_helper, 'verify_and_update_password_in_pool', verify_and_update_password_in_pool)
+
+    background_tasks = BackgroundTasks()
+    await account_helper.authenticate_account(device_ip='127.0.0.1', data=test_login, auth_type=AuthType.email.value, background_tasks=background_tasks)
+    await background_tasks()
+
+    # The old hash is never cached, the new one is written through after the invalidation
+    cached = [call for call in calls if call[0] == 'cache']
+    assert cached == [('cache', 'new-hash')]
+    assert calls.index(('delete', f"account:{test_account['_id']}")) < calls.index(('cache', 'new-hash'))
+
+
+@pytest.mark.anyio
+async def test_login_cache_miss_without_rehash_caches_account(calls, monkeypatch):
+    async def verify_and_update_password_in_pool(plain_password, hashed_password):
+        return True, None
+
+    monkeypatch.setattr(account_helper, 'verify_and_update_password_in_pool', verify_and_update_password_in_pool)
+
+    background_tasks = BackgroundTasks()
+    await account_helper.authenticate_account(device_ip='127.0.0.1', data=test_login, auth_type=AuthType.email.value, background_tasks=background_tasks)
+
+    # Nothing is cached before the response goes out
+    assert calls == []
+
+    await background_tasks()
+    assert calls == [('cache', 'old-hash')]
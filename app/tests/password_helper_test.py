@@ -0,0 +1,26 @@
+import pytest
+from core.helper.password_helper import build_password_context
+
+
+# Test password
+test_password = 'stringst123'
+
+
+@pytest.mark.parametrize('hashed_rounds,needs_update', [(4, True), (5, False), (6, True)], ids=['lower-cost', 'same-cost', 'higher-cost'])
+def test_password_context_needs_update_for_other_cost(hashed_rounds, needs_update):
+    context = build_password_context(scheme='bcrypt', rounds=5)
+    hashed_password = build_password_context(scheme='bcrypt', rounds=hashed_rounds).hash(test_password)
+
+    assert context.needs_update(hashed_password) is needs_update
+    assert context.verify(test_password, hashed_password)
+
+
+def test_password_context_rehashes_higher_cost_to_configured_cost():
+    context = build_password_context(scheme='bcrypt', rounds=4)
+    hashed_password = build_password_context(scheme='bcrypt', rounds=6).hash(test_password)
+
+    valid, new_hashed_password = context.verify_and_update(test_password, hashed_password)
+
+    assert valid
+    assert new_hashed_password is not None
+    assert not context.needs_update(new_hashed_password)
@@ -0,0 +1,83 @@
+import dataclasses
+import pytest
+from core.utils.settings import settings
+from core.model.key_model import KeyRingEntry
+from core.helper import token_helper
+from core.helper.key_ring_helper import KeyRing, build_ring_key
+from core.helper.jwt_backend_helper import get_jwt_backend
+
+
+# Test key rings, each signing with a kid
+test_access_ring = KeyRing(keys=[build_ring_key(KeyRingEntry(kid='test-access-1', algorithm='HS256', secret='test-access-secret'))])
+test_refresh_ring = KeyRing(keys=[build_ring_key(KeyRingEntry(kid='test-refresh-1', algorithm='HS256', secret='test-refresh-secret'))])
+
+# Test accounts
+test_accounts = [
+    {'id': f"78459412146{index:02d}", 'is_admin': index == 0, 'firstname': f"John{index}", 'lastname': 'Doe', 'email': f"johndoe{index}@example.com"}
+    for index in range(5)
+]
+
+
+@pytest.fixture(autouse=True)
+def key_rings(monkeypatch):
+    monkeypatch.setattr(token_helper, 'get_access_key_ring', lambda: test_access_ring)
+    monkeypatch.setattr(token_helper, 'get_refresh_key_ring', lambda: test_refresh_ring)
+
+
+def test_get_token_claims_shared_template():
+    access_claims, refresh_claims = token_helper.get_token_claims(**test_accounts[0], issued_on=1700000000)
+
+    assert access_claims['iat'] == refresh_claims['iat'] == 1700000000
+    assert access_claims['exp'] == 1700000000 + settings.api_access_token_expiry
+    assert refresh_claims['exp'] == 1700000000 + settings.api_refresh_token_expiry
+    assert {name: value for name, value in access_claims.items() if name != 'exp'} == \
+        {name: value for name, value in refresh_claims.items() if name != 'exp'}
+    assert (access_claims['iss'], access_claims['aud'], access_claims['sub']) == (settings.api_token_iss, settings.api_token_aud, settings.api_token_sub)
+
+
+def test_generate_token_sets_order_and_claims():
+    token_sets = token_helper.generate_token_sets(accounts=test_accounts)
+
+    assert len(token_sets) == len(test_accounts)
+    issued_on = set()
+    for account, (access_token, refresh_token) in zip(test_accounts, token_sets):
+        access_claims = token_helper.verify_token(token=access_token, key_ring=test_access_ring)
+        refresh_claims = token_helper.verify_token(token=refresh_token, key_ring=test_refresh_ring)
+
+        # Each pair belongs to the account at the same position
+        assert access_claims['id'] == refresh_claims['id'] == account['id']
+        assert access_claims['email'] == account['email']
+        assert access_claims['admin'] == account['is_admin']
+
+        assert access_claims['exp'] - access_claims['iat'] == settings.api_access_token_expiry
+        assert refresh_claims['exp'] - refresh_claims['iat'] == settings.api_refresh_token_expiry
+        issued_on.update((access_claims['iat'], refresh_claims['iat']))
+
+    # One issue time for the whole batch
+    assert len(issued_on) == 1
+
+
+def test_generate_token_sets_kid_header():
+    access_token, refresh_token = token_helper.generate_token_sets(accounts=test_accounts[:1])[0]
+
+    assert get_jwt_backend().get_unverified_header(access_token)['kid'] == 'test-access-1'
+    assert get_jwt_backend().get_unverified_header(refresh_token)['kid'] == 'test-refresh-1'
+
+
+def test_generate_token_sets_matches_generate_token_set():
+    access_token, refresh_token = token_helper.generate_token_set(**test_accounts[1])
+    batch_access_token, batch_refresh_token = token_helper.generate_token_sets(accounts=[test_accounts[1]])[0]
+
+    batch_access_claims = token_helper.verify_token(token=batch_access_token, key_ring=test_access_ring)
+    access_claims = token_helper.verify_token(token=access_token, key_ring=test_access_ring)
+    assert {name: value for name, value in access_claims.items() if name not in ('iat', 'exp')} == \
+        {name: value for name, value in batch_access_claims.items() if name not in ('iat', 'exp')}
+    assert token_helper.verify_token(token=refresh_token, key_ring=test_refresh_ring)['id'] == test_accounts[1]['id']
+
+
+def test_sign_token_raises_on_failure():
+    # A verify-only key cannot sign
+    verify_only_key = dataclasses.replace(test_access_ring.get_signing_key(), signing_key=None)
+
+    with pytest.raises(Exception):
+        token_helper.sign_token(payload={'id': test_accounts[0]['id']}, ring_key=verify_only_key)
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from core.helper import token_session_helper
+
+
+class SessionCollection:
+    """
+    Keeps sessions in memory, yielding between calls like a database round trip.
+    """
+
+    def __init__(self, sessions: dict):
+        self.sessions = sessions
+
+    async def delete_one(self, filter: dict):
+        await asyncio.sleep(0)
+        return SimpleNamespace(deleted_count=1 if self.sessions.pop(filter['_id'], None) is not None else 0)
+
+    async def insert_one(self, document: dict):
+        await asyncio.sleep(0)
+        self.sessions[document['_id']] = document
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return 'asyncio'
+
+
+@pytest.fixture
+def sessions(monkeypatch) -> dict:
+    sessions = {'7845941214687-old-token': {'_id': '7845941214687-old-token'}}
+    monkeypatch.setattr(token_session_helper, 'token_session_col', SessionCollection(sessions))
+    return sessions
+
+
+@pytest.mark.anyio
+async def test_rotate_token_session_concurrent_reuse(sessions):
+    # Two refreshes with the same token
+    results = await asyncio.gather(
+        token_session_helper.rotate_token_session(id='7845941214687', old_encrypted_token='old-token', new_encrypted_token='new-token-1', device_ip='127.0.0.1'),
+        token_session_helper.rotate_token_session(id='7845941214687', old_encrypted_token='old-token', new_encrypted_token='new-token-2', device_ip='127.0.0.1'),
+    )
+
+    assert sorted(results) == [False, True]
+    assert len(sessions) == 1
+    assert next(iter(sessions.values()))['device_ip'] == '127.0.0.1'
+
+
+@pytest.mark.anyio
+async def test_rotate_token_session_missing_session(sessions):
+    is_rotated = await token_session_helper.rotate_token_session(id='7845941214687', old_encrypted_token='other-token', new_encrypted_token='new-token')
+
+    assert is_rotated is False
+    assert list(sessions) == ['7845941214687-old-token']
@@ -0,0 +1,88 @@
+import time
+import pytest
+from fastapi import HTTPException
+from core.utils.settings import settings
+from core.model.key_model import KeyRingEntry
+from core.helper import token_helper
+from core.helper.key_ring_helper import KeyRing, build_ring_key
+from core.helper.local_cache_helper import verified_token_local_cache
+
+
+# Test signing keys
+test_key = build_ring_key(KeyRingEntry(kid='test-access-1', algorithm='HS256', secret='test-access-secret-1'))
+test_next_key = build_ring_key(KeyRingEntry(kid='test-access-2', algorithm='HS256', secret='test-access-secret-2'))
+
+
+@pytest.fixture(autouse=True)
+def key_ring(monkeypatch) -> KeyRing:
+    verified_token_local_cache.clear()
+    ring = KeyRing(keys=[test_key])
+    monkeypatch.setattr(token_helper, 'get_access_key_ring', lambda: ring)
+    return ring
+
+
+def create_test_token(ring_key=test_key, expiry: int = 60) -> str:
+    payload = {
+        'iss': settings.api_token_iss,
+        'aud': settings.api_token_aud,
+        'sub': settings.api_token_sub,
+        'id': '7845941214687',
+        'iat': int(time.time()),
+        'exp': int(time.time()) + expiry,
+    }
+    return token_helper.sign_token(payload=payload, ring_key=ring_key)
+
+
+def test_verify_access_token_cache_hit():
+    token = create_test_token()
+
+    payload = token_helper.verify_access_token(token=token)
+    hits = verified_token_local_cache.get_stats()['hits']
+
+    assert token_helper.verify_access_token(token=token) == payload
+    assert verified_token_local_cache.get_stats()['hits'] == hits + 1
+
+
+def test_verify_access_token_cache_rejects_tampered_token():
+    token = create_test_token()
+    token_helper.verify_access_token(token=token)
+
+    # Flip the last signature character
+    tampered_token = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+
+    with pytest.raises(HTTPException):
+        token_helper.verify_access_token(token=tampered_token)
+
+
+def test_verify_access_token_cache_drops_retired_key(monkeypatch):
+    token = create_test_token()
+    token_helper.verify_access_token(token=token)
+
+    # Rotate to a ring without the key the token was verified with
+    next_ring = KeyRing(keys=[test_next_key])
+    monkeypatch.setattr(token_helper, 'get_access_key_ring', lambda: next_ring)
+
+    with pytest.raises(HTTPException):
+        token_helper.verify_access_token(token=token)
+
+
+def test_verify_access_token_cache_drops_reloaded_key(monkeypatch):
+    token = create_test_token()
+    token_helper.verify_access_token(token=token)
+
+    # Same kid, different key material
+    reloaded_key = build_ring_key(KeyRingEntry(kid=test_key.kid, algorithm='HS256', secret='test-access-secret-3'))
+    reloaded_ring = KeyRing(keys=[reloaded_key])
+    monkeypatch.setattr(token_helper, 'get_access_key_ring', lambda: reloaded_ring)
+
+    with pytest.raises(HTTPException):
+        token_helper.verify_access_token(token=token)
+
+
+def test_verify_access_token_not_cached_when_expired():
+    token = create_test_token(expiry=-1)
+
+    with pytest.raises(HTTPException):
+        token_helper.verify_access_token(token=token)
+
+    assert verified_token_local_cache.get_stats()['size'] == 0
@@ -5,6 +5,7 @@ from typing import AsyncIterator
 from app.main import app
 from core.utils.settings import settings
 from core.helper.request_helper import send_post_request
+from core.helper.jwt_backend_helper import NativeBackend
 
 
 # Account registration url
@@ -50,6 +51,10 @@ test_user_login_credentials = {
         "email": "johndoe1@example.com"
     }
 
+# Token whose header kid is a list instead of a string
+test_malformed_kid_token = NativeBackend().encode(claims={'id': '7845941214687'}, key=b'test-secret', algorithm='HS256', headers={'kid': ['x']})
+
+
 @pytest.fixture(scope="session")
 def anyio_backend() -> str:
     return 'asyncio'
@@ -75,6 +80,19 @@ async def test_verify_access_token_failed_invalid_access_token(client: httpx.Asy
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+@pytest.mark.anyio
+async def test_verify_access_token_failed_malformed_kid(client: httpx.AsyncClient):
+    # Header
+    test_header = {
+        'Authorization': f"Bearer {test_malformed_kid_token}",
+    }
+
+    # Send request
+    response = await client.get(account_url, headers=test_header)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
 @pytest.mark.anyio
 async def test_verify_access_token_successful(client: httpx.AsyncClient):
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, status, BackgroundTasks
 from core.model.account_model import *
 from core.helper.account_helper import get_current_active_account
 from core.controllers.auth_controller import *
@@ -16,19 +16,29 @@ async def verify_access_token(request: Request):
     return await verify_access_token_ctrl(request=request)
 
 
+@auth.post('/access-token/introspect/', description='Verify many access tokens, and check refresh tokens for revocation, in one call', status_code=status.HTTP_200_OK, response_model=IntrospectTokensResponse)
+async def introspect_tokens(data: IntrospectTokens):
+    return await introspect_tokens_ctrl(data=data)
+
+
+@auth.get('/.well-known/jwks.json', description='Public keys used to verify access tokens', status_code=status.HTTP_200_OK)
+async def get_jwks(request: Request):
+    return await get_jwks_ctrl(request=request)
+
+
 @auth.get('/access-token/refresh/', description="Get a new access and refresh token pair from pre-issued refresh token.", response_model=TokenResponse)
-async def get_new_access_token(request: Request):
-    return await create_access_token_ctrl(request=request)
+async def get_new_access_token(request: Request, background_tasks: BackgroundTasks):
+    return await create_access_token_ctrl(request=request, background_tasks=background_tasks)
 
 
 @auth.post('/login/email/', description='This endpoint returns an access token and a refresh token for an authenticated client', status_code=status.HTTP_200_OK, response_model=TokenResponse)
-async def login_with_email_for_access_token(request: Request, data: AccountLoginWithEmail):
-   return await login_for_access_token_ctrl(request=request, data=data, auth_type=AuthType.email.value)
+async def login_with_email_for_access_token(request: Request, data: AccountLoginWithEmail, background_tasks: BackgroundTasks):
+   return await login_for_access_token_ctrl(request=request, data=data, auth_type=AuthType.email.value, background_tasks=background_tasks)
 
 
 @auth.post('/login/phone-number/', description='This endpoint returns an access token and a refresh token for an authenticated client', status_code=status.HTTP_200_OK, response_model=TokenResponse)
-async def login_with_phone_number_for_access_token(request: Request, data: AccountLoginWithPhone):
-   return await login_for_access_token_ctrl(data=data, auth_type=AuthType.phone, request=request)
+async def login_with_phone_number_for_access_token(request: Request, data: AccountLoginWithPhone, background_tasks: BackgroundTasks):
+   return await login_for_access_token_ctrl(data=data, auth_type=AuthType.phone, request=request, background_tasks=background_tasks)
 
 
 @auth.post('/otp/verify/', description="Verify OTP and generate authorization token")
@@ -42,5 +52,5 @@ async def verify_auth_token(verify_auth_token: VerifyAuthToken):
 
 
 @auth.post('/logout/', description="Logout an account")
-async def logout(request: Request):
-    return await logout_ctrl(request=request)
+async def logout(request: Request, background_tasks: BackgroundTasks):
+    return await logout_ctrl(request=request, background_tasks=background_tasks)
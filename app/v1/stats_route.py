@@ -0,0 +1,15 @@
+from fastapi import APIRouter, status
+from core.utils.settings import settings
+from core.controllers.stats_controller import get_stats_ctrl
+
+
+stats = APIRouter(
+    prefix=f"{settings.api_prefix}stats",
+    tags=['Stats'],
+    include_in_schema=False,
+)
+
+
+@stats.get('/', description='Internal service counters', status_code=status.HTTP_200_OK)
+async def get_stats():
+    return await get_stats_ctrl()